@@ -1,11 +1,51 @@
-from flask import Flask, jsonify
-import pandas as pd
+from flask import Flask, Response, jsonify, request
+import argparse
+import logging
+import os
 import sqlite3
+import threading
 from datetime import datetime
-from Task_1 import compute_pnl  # Import the compute_pnl function from Task_1.py
+from trade_store import TradeStore  # Import the process-wide trade cache from trade_store.py
+from partitioned_store import PartitionedTradeStore  # Import the multi-period store from partitioned_store.py
+from service_metrics import PhaseTimer, ServiceMetrics  # Import the request metrics from service_metrics.py
+from price_models import MODEL_DIR, PriceModel  # Import the persisted price models from price_models.py
 
 app = Flask(__name__)
 
+# Process-wide trade store: the table is loaded once and reloaded only when the database changes
+trade_store = TradeStore()
+
+# Multi-period store over every epex_* delivery-period table, used when a period range is requested
+partitioned_store = PartitionedTradeStore()
+
+# Request counters and latency histograms, exposed on /metrics (the slow-request log is off by default)
+metrics = ServiceMetrics()
+
+# Next-day intraday price models, loaded on the first /predict request and kept warm until they are re-saved
+model_dir = MODEL_DIR
+_price_model = None
+_price_model_mtime = None  # Modification time of the meta.json the models were loaded from
+_price_model_lock = threading.Lock()
+
+def get_price_model() -> PriceModel:
+    """
+    Returns the process-wide price models, memory-mapping them from model_dir on first use and
+    again whenever meta.json changes, so models re-saved by Task 2.7 are served without a restart.
+    """
+    global _price_model, _price_model_mtime
+    with _price_model_lock:
+        try:
+            mtime = os.stat(os.path.join(model_dir, 'meta.json')).st_mtime_ns
+        except FileNotFoundError:
+            # A save in progress removes meta.json until it is done: keep serving the loaded models meanwhile
+            if _price_model is None:
+                raise
+            return _price_model
+        if _price_model is None or mtime != _price_model_mtime:
+            _price_model = PriceModel(model_dir)
+            _price_model_mtime = mtime
+        return _price_model
+
 # Define API endpoint to calculate and return PnL for a specific strategy
 @app.route('/pnl/<strategy_id>', methods=['GET'])
 def get_pnl(strategy_id):
@@ -15,23 +55,43 @@ def get_pnl(strategy_id):
     Args:
         strategy_id (str): Identifier of the trading strategy.
 
+    Query parameters (optional):
+        from (str): First delivery period to include, e.g. '12_20_12_13' or '12_20' for a whole day.
+        to (str): Last delivery period to include.
+        If either is given, the PnL is summed over every epex_* delivery-period table in the range.
+
     Returns:
         JSON response containing:
             - strategy (str): The strategy ID.
             - value (float): Calculated PnL.
             - unit (str): Currency unit (euro).
             - capture_time (str): Timestamp of the PnL calculation in ISO 8601 format.
+            - periods (dict): PnL per delivery period (only when a period range is requested).
         If an error occurs, a JSON response with error details is returned.
     """
+    # Per-phase timings and counters of this request, recorded in the metrics when it finishes
+    timer = PhaseTimer()
+    error, cache_hit, rows_scanned = True, None, 0
     try:
-        # Connect to the SQLite database
-        conn = sqlite3.connect('trades.sqlite')
-        
-        # Load trade data from the specified database table into a pandas DataFrame
-        trades_df = pd.read_sql_query("SELECT * FROM epex_12_20_12_13", conn)
+        from_period = request.args.get('from')
+        to_period = request.args.get('to')
 
-        # Calculate the PnL for the provided strategy using the imported compute_pnl function
-        pnl_value = compute_pnl(strategy_id, trades_df)
+        if from_period or to_period:
+            # Sum the PnL over the requested delivery periods from the partitioned store
+            try:
+                with timer.phase('partitions'):
+                    period_aggregates = partitioned_store.period_aggregates(from_period, to_period)
+            except ValueError as e:
+                return jsonify({"error": "Invalid period range", "details": str(e)}), 400
+            periods = {period: aggregates.pnl(strategy_id) for period, aggregates in period_aggregates.items()}
+            pnl_value = sum(periods.values())
+        else:
+            # Look up the precomputed PnL for the provided strategy (the store reloads only if the database changed)
+            periods = None
+            reloaded = trade_store.refresh(timer)
+            cache_hit = not reloaded
+            rows_scanned = trade_store.rows_loaded if reloaded else 0
+            pnl_value = trade_store.aggregates.pnl(strategy_id)
 
         # Construct the response with calculated PnL and additional metadata
         response = {
@@ -40,8 +100,13 @@ def get_pnl(strategy_id):
             "unit": "euro",           # The currency unit for PnL
             "capture_time": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")  # Current UTC timestamp
         }
+        if periods is not None:
+            response["periods"] = periods  # PnL per delivery period in the requested range
 
-        return jsonify(response), 200  # Return the response with HTTP 200 OK status
+        with timer.phase('serialize'):
+            body = jsonify(response)
+        error = False
+        return body, 200  # Return the response with HTTP 200 OK status
 
     except sqlite3.Error as e:
         # Handle database-related errors
@@ -52,10 +117,197 @@ def get_pnl(strategy_id):
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
 
     finally:
-        # Ensure the database connection is closed, even if an error occurs
-        conn.close()
+        metrics.record_request('pnl', timer, error=error, cache_hit=cache_hit, rows_scanned=rows_scanned)
+
+# Define API endpoint to expose the service metrics
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    API endpoint exposing request, error, cache-hit and rows-scanned counters and latency histograms
+    in Prometheus text format.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def _batch_pnl_response(strategy_ids):
+    """
+    Builds the response of the batch endpoints: the PnL of many strategies from one snapshot of the aggregates.
+    """
+    if not strategy_ids:
+        return jsonify({"error": "No strategies given", "details": "Pass at least one strategy ID"}), 400
+
+    try:
+        # One store lookup answers every requested strategy
+        aggregates = trade_store.get_aggregates()
+
+        response = {
+            "values": {strategy_id: aggregates.pnl(strategy_id) for strategy_id in strategy_ids},  # PnL per strategy
+            "unit": "euro",  # The currency unit for PnL
+            "capture_time": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")  # Current UTC timestamp
+        }
+
+        return jsonify(response), 200
+
+    except sqlite3.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+# Define API endpoints to return the PnL of many strategies in one round trip
+@app.route('/pnl', methods=['GET'])
+def get_pnl_batch():
+    """
+    API endpoint to return the PnL of several strategies, e.g. GET /pnl?strategy=strategy_1&strategy=strategy_2.
+
+    Returns:
+        JSON response containing:
+            - values (dict): Calculated PnL per strategy ID.
+            - unit (str): Currency unit (euro).
+            - capture_time (str): Timestamp of the PnL calculation in ISO 8601 format.
+        If an error occurs, a JSON response with error details is returned.
+    """
+    return _batch_pnl_response(request.args.getlist('strategy'))
+
+@app.route('/pnl/batch', methods=['POST'])
+def post_pnl_batch():
+    """
+    API endpoint to return the PnL of several strategies, given as a JSON body {"strategies": ["strategy_1", ...]}.
+
+    Returns:
+        The same JSON response as GET /pnl.
+    """
+    body = request.get_json(silent=True) or {}
+    strategy_ids = body.get('strategies') if isinstance(body, dict) else None
+    if not isinstance(strategy_ids, list) or not all(isinstance(strategy_id, str) for strategy_id in strategy_ids):
+        return jsonify({"error": "Invalid request body", "details": 'Expected {"strategies": [<strategy ID>, ...]}'}), 400
+    return _batch_pnl_response(strategy_ids)
+
+# Define API endpoint to push new trades into the database
+@app.route('/trades', methods=['POST'])
+def post_trades():
+    """
+    API endpoint to bulk-insert trades, given as a JSON list (or {"trades": [...]}) of objects with
+    'id', 'quantity', 'price', 'side' and 'strategy' fields.
+
+    The cached PnL is updated incrementally, so /pnl reflects the new trades immediately.
+
+    Returns:
+        JSON response containing:
+            - inserted (int): Number of trades inserted.
+        If an error occurs, a JSON response with error details is returned.
+    """
+    body = request.get_json(silent=True)
+    trades = body.get('trades') if isinstance(body, dict) else body
+    if not isinstance(trades, list):
+        return jsonify({"error": "Invalid request body", "details": "Expected a JSON list of trades"}), 400
+
+    try:
+        inserted = trade_store.insert_trades(trades)
+        return jsonify({"inserted": inserted}), 201
+
+    except ValueError as e:
+        # Handle malformed trades (nothing was inserted)
+        return jsonify({"error": "Invalid trade", "details": str(e)}), 400
+
+    except sqlite3.IntegrityError as e:
+        # Handle duplicate trade IDs; any other constraint (e.g. NOT NULL) rejects the trade itself
+        if 'UNIQUE' in str(e) or 'PRIMARY KEY' in str(e):
+            return jsonify({"error": "Duplicate trade", "details": str(e)}), 409
+        return jsonify({"error": "Invalid trade", "details": str(e)}), 400
+
+    except sqlite3.Error as e:
+        return jsonify({"error": "Database error", "details": str(e)}), 500
+
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+# Define API endpoint to predict next-day intraday prices
+@app.route('/predict', methods=['POST'])
+def post_predict():
+    """
+    API endpoint returning the OLS and Random Forest next-day intraday price predictions for one or
+    more days, given as {"days": [{"date": "2022-01-01", "intra_price": [...], "da_price": [...],
+    "wind_da_forecast": [...], "pv_da_forecast": [...]}, ...]} with one value per quarter-hour.
+
+    All days are predicted in one batch by the persisted models (see price_models.py).
+
+    Returns:
+        JSON response containing:
+            - predictions (list): Per day, its 'date' and the 'ols' and 'rf' predictions per quarter-hour.
+        If an error occurs, a JSON response with error details is returned.
+    """
+    timer = PhaseTimer()
+    error = True
+    try:
+        body = request.get_json(silent=True)
+        days = body.get('days') if isinstance(body, dict) else None
+        if not isinstance(days, list) or not days:
+            return jsonify({"error": "Invalid request body", "details": 'Expected {"days": [<day>, ...]}'}), 400
+
+        try:
+            with timer.phase('load'):
+                price_model = get_price_model()
+        except (FileNotFoundError, ValueError) as e:
+            # Handle missing or incompatible models (train them with `python price_models.py train`)
+            return jsonify({"error": "Model not available", "details": str(e)}), 503
+
+        with timer.phase('predict'):
+            predictions = price_model.predict_days(days)
+        with timer.phase('serialize'):
+            response = jsonify({"predictions": predictions})
+        error = False
+        return response, 200
+
+    except ValueError as e:
+        # Handle malformed days
+        return jsonify({"error": "Invalid day", "details": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500
+
+    finally:
+        metrics.record_request('predict', timer, error=error)
+
+def serve(host: str = '0.0.0.0', port: int = 5000, threads: int = 8) -> None:
+    """
+    Serves the app with a multi-threaded production WSGI server instead of Flask's development server.
+
+    Uses waitress if it is installed, otherwise Werkzeug's threaded server without the debugger and reloader.
+    All worker threads share the process-wide trade store and its single long-lived connection.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+        threads (int): Number of worker threads (waitress only).
+    """
+    # Load the trades before accepting requests so that the first request doesn't pay for it
+    trade_store.refresh()
+
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        from werkzeug.serving import run_simple
+        run_simple(host, port, app, threaded=True, use_debugger=False, use_reloader=False)
+    else:
+        waitress_serve(app, host=host, port=port, threads=threads)
 
 # Entry point to run the Flask application
 if __name__ == "__main__":
-    # Start the Flask app on all available network interfaces, port 5000, with debugging enabled
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    parser = argparse.ArgumentParser(description="PnL reporting API")
+    parser.add_argument('--production', action='store_true', help="Serve with a threaded production WSGI server")
+    parser.add_argument('--port', type=int, default=5000, help="Port to listen on")
+    parser.add_argument('--threads', type=int, default=8, help="Number of worker threads in production mode")
+    parser.add_argument('--model-dir', default=MODEL_DIR, help="Directory of the persisted price models")
+    parser.add_argument('--slow-request-ms', type=float, help="Log the phase breakdown of requests slower than this")
+    args = parser.parse_args()
+    model_dir = args.model_dir
+
+    if args.slow_request_ms is not None:
+        logging.basicConfig(level=logging.INFO)
+        metrics.slow_request_threshold_s = args.slow_request_ms / 1000
+
+    if args.production:
+        serve(port=args.port, threads=args.threads)
+    else:
+        # Start the Flask app on all available network interfaces, port 5000, with debugging enabled
+        app.run(host='0.0.0.0', port=args.port, debug=True)
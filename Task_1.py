@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import sqlite3
 
 # ## Task 1: Minimal Reporting tool
@@ -74,6 +75,27 @@ if __name__ == "__main__":
 
 # ## Task 1.2 - Profit & Loss (PnL) Calculator  
 
+def compute_pnl_all(trades_df: pd.DataFrame) -> dict:
+    """
+    Compute the profit and loss (PnL) of every strategy in a single columnar pass.
+
+    Args:
+        trades_df (pd.DataFrame): The pandas DataFrame containing trade data (must have 'strategy', 'side', 'quantity', 'price' columns).
+
+    Returns:
+        dict: A mapping of strategy ID to its computed PnL.
+    """
+    # Sign of each trade: +1 for 'sell' orders (money received), -1 for 'buy' orders (money paid)
+    sign = np.where(trades_df['side'] == 'sell', 1.0, -1.0)
+
+    # Signed notional of every trade, computed on whole columns at once
+    signed_notional = sign * trades_df['quantity'].to_numpy() * trades_df['price'].to_numpy()
+
+    # Sum the signed notional per strategy in one grouped reduction
+    pnl_by_strategy = pd.Series(signed_notional, index=trades_df.index).groupby(trades_df['strategy'], observed=True).sum()
+
+    return pnl_by_strategy.to_dict()
+
 def compute_pnl(strategy_id: str, trades_df: pd.DataFrame) -> float:
     """
     Compute the profit and loss (PnL) for a given strategy from trade data.
@@ -85,23 +107,306 @@ def compute_pnl(strategy_id: str, trades_df: pd.DataFrame) -> float:
     Returns:
         float: The computed PnL for the specified strategy.
     """
-    # Filter the DataFrame to include only trades for the specified strategy
-    df_strategy = trades_df[trades_df['strategy'] == strategy_id]
+    # Look the strategy up in the PnL of all strategies, returning 0 if it has no trades
+    return compute_pnl_all(trades_df).get(strategy_id, 0)
+
+# ### Running trade aggregates
+
+class Trade_Aggregates:
+    """
+    Running per-strategy buy volume, sell volume and PnL that can be built once and then queried or updated.
+
+    Args:
+        buy_volume (dict): Buy volume per strategy.
+        sell_volume (dict): Sell volume per strategy.
+        pnl (dict): PnL per strategy.
+
+    Methods:
+        from_frame(trades_df): Builds the aggregates of a trades DataFrame.
+        update(trades_df): Folds further trades into the aggregates.
+        merge(other): Folds another set of aggregates into these ones.
+        Buy_Volume(): Returns the total volume of buy orders.
+        Sell_Volume(): Returns the total volume of sell orders.
+        pnl(strategy_id): Returns the PnL of a strategy.
+    """
+    def __init__(self, buy_volume: dict = None, sell_volume: dict = None, pnl: dict = None):
+        self.buy_volume = dict(buy_volume or {})
+        self.sell_volume = dict(sell_volume or {})
+        self.pnl_by_strategy = dict(pnl or {})
+
+    @classmethod
+    def from_frame(cls, trades_df: pd.DataFrame) -> "Trade_Aggregates":
+        """
+        Builds the aggregates of a trades DataFrame.
+
+        Args:
+            trades_df (pd.DataFrame): A pandas DataFrame containing trade data (must have 'strategy', 'side', 'quantity', 'price' columns).
+
+        Returns:
+            Trade_Aggregates: The aggregates of the given trades.
+        """
+        aggregates = cls()
+        aggregates.update(trades_df)
+        return aggregates
+
+    @classmethod
+    def from_sql(cls, conn: sqlite3.Connection, table: str = 'epex_12_20_12_13') -> "Trade_Aggregates":
+        """
+        Builds the aggregates of a trades table inside SQLite, without loading the trades into Python.
+
+        Args:
+            conn (sqlite3.Connection): An open connection to the trades database.
+            table (str): Name of the trades table.
+
+        Returns:
+            Trade_Aggregates: The aggregates of the table.
+        """
+        aggregates = cls()
+        rows = conn.execute(f"SELECT strategy, side, SUM(quantity), {SIGNED_NOTIONAL_SQL} "
+                            f"FROM {table} GROUP BY strategy, side")
+        for strategy_id, side, quantity_sum, pnl_sum in rows:
+            volume = aggregates.sell_volume if side == 'sell' else aggregates.buy_volume
+            volume[strategy_id] = quantity_sum
+            aggregates.pnl_by_strategy[strategy_id] = aggregates.pnl_by_strategy.get(strategy_id, 0) + pnl_sum
+        return aggregates
+
+    def update(self, trades_df: pd.DataFrame) -> None:
+        """
+        Folds further trades into the aggregates with one grouped reduction over (strategy, side).
+
+        Args:
+            trades_df (pd.DataFrame): A pandas DataFrame containing trade data (must have 'strategy', 'side', 'quantity', 'price' columns).
+        """
+        if trades_df.empty:
+            return
+
+        # Quantity and signed notional (+ for 'sell', - for 'buy') of every trade
+        is_sell = (trades_df['side'] == 'sell').to_numpy()
+        quantity = trades_df['quantity'].to_numpy()
+        signed_notional = np.where(is_sell, 1.0, -1.0) * quantity * trades_df['price'].to_numpy()
+
+        # Sum both per strategy and side
+        grouped = pd.DataFrame({
+            'strategy': trades_df['strategy'].array,  # Keeps categorical strategies as codes
+            'is_sell': is_sell,
+            'quantity': quantity,
+            'pnl': signed_notional,
+        }).groupby(['strategy', 'is_sell'], observed=True).sum()
+
+        # Add the group totals to the running totals (one iteration per strategy and side, not per trade)
+        for (strategy_id, sell), quantity_sum, pnl_sum in zip(grouped.index, grouped['quantity'].tolist(), grouped['pnl'].tolist()):
+            volume = self.sell_volume if sell else self.buy_volume
+            volume[strategy_id] = volume.get(strategy_id, 0) + quantity_sum
+            self.pnl_by_strategy[strategy_id] = self.pnl_by_strategy.get(strategy_id, 0) + pnl_sum
+
+    def merge(self, other: "Trade_Aggregates") -> "Trade_Aggregates":
+        """
+        Folds another set of aggregates into these ones.
+
+        Args:
+            other (Trade_Aggregates): The aggregates to add.
+
+        Returns:
+            Trade_Aggregates: These aggregates, updated in place.
+        """
+        for target, source in ((self.buy_volume, other.buy_volume),
+                               (self.sell_volume, other.sell_volume),
+                               (self.pnl_by_strategy, other.pnl_by_strategy)):
+            for strategy_id, value in source.items():
+                target[strategy_id] = target.get(strategy_id, 0) + value
+        return self
+
+    def Buy_Volume(self, *args, **kwargs) -> float:
+        """
+        Returns the total buy volume across all strategies.
+        """
+        return sum(self.buy_volume.values())
+
+    def Sell_Volume(self, *args, **kwargs) -> float:
+        """
+        Returns the total sell volume across all strategies.
+        """
+        return sum(self.sell_volume.values())
+
+    def pnl(self, strategy_id: str) -> float:
+        """
+        Returns the PnL of a strategy, 0 if it has no trades.
+        """
+        return self.pnl_by_strategy.get(strategy_id, 0)
+
+# ### SQL pushdown backend
+
+# Signed notional summed inside SQLite: + for 'sell' orders, - for 'buy' orders
+SIGNED_NOTIONAL_SQL = "SUM(CASE side WHEN 'sell' THEN quantity * price ELSE -quantity * price END)"
+
+def ensure_trade_indexes(conn: sqlite3.Connection, table: str = 'epex_12_20_12_13') -> None:
+    """
+    Creates the covering index used by the SQL aggregations if it is missing.
+
+    The index holds every column the aggregations read, so SQLite answers them from the index alone
+    without visiting the table rows. This is a one-off migration, run when the database is set up:
+    it writes to the database and commits, so the read helpers below never call it.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the trades database.
+        table (str): Name of the trades table.
+    """
+    try:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_strategy_side ON {table} (strategy, side, quantity, price)")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # A read-only database can still be aggregated, just without the index
+        print(f"Could not create index on {table}: {e}")
+
+class SQL_Volume_Calculator:
+    """
+    A class to calculate the total buy and sell volumes inside SQLite, without loading the trades into pandas.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the trades database.
+        table (str): Name of the trades table (must have columns 'side' and 'quantity').
+
+    Methods:
+        Buy_Volume(): Calculates the total volume of buy orders.
+        Sell_Volume(): Calculates the total volume of sell orders.
+    """
+    def __init__(self, conn: sqlite3.Connection, table: str = 'epex_12_20_12_13'):
+        self.conn = conn
+        self.table = table
+
+    def _volume_by_side(self) -> dict:
+        # One scan answers both sides (of the covering index, once ensure_trade_indexes has created it)
+        rows = self.conn.execute(f"SELECT side, SUM(quantity) FROM {self.table} GROUP BY side")
+        return dict(rows.fetchall())
+
+    def Buy_Volume(self, *args, **kwargs) -> float:
+        """
+        Calculates the total buy volume (SUM(quantity) where side == 'buy').
+
+        Returns:
+            float: The total buy volume.
+        """
+        return self._volume_by_side().get('buy', 0)
+
+    def Sell_Volume(self, *args, **kwargs) -> float:
+        """
+        Calculates the total sell volume (SUM(quantity) where side == 'sell').
+
+        Returns:
+            float: The total sell volume.
+        """
+        return self._volume_by_side().get('sell', 0)
+
+def compute_pnl_all_sql(conn: sqlite3.Connection, table: str = 'epex_12_20_12_13') -> dict:
+    """
+    Compute the profit and loss (PnL) of every strategy inside SQLite.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the trades database.
+        table (str): Name of the trades table (must have 'strategy', 'side', 'quantity', 'price' columns).
+
+    Returns:
+        dict: A mapping of strategy ID to its computed PnL.
+    """
+    rows = conn.execute(f"SELECT strategy, {SIGNED_NOTIONAL_SQL} FROM {table} GROUP BY strategy")
+    return dict(rows.fetchall())
+
+def compute_pnl_sql(strategy_id: str, conn: sqlite3.Connection, table: str = 'epex_12_20_12_13') -> float:
+    """
+    Compute the profit and loss (PnL) for a given strategy inside SQLite.
+
+    Args:
+        strategy_id (str): The ID of the strategy for which to compute the PnL.
+        conn (sqlite3.Connection): An open connection to the trades database.
+        table (str): Name of the trades table (must have 'strategy', 'side', 'quantity', 'price' columns).
+
+    Returns:
+        float: The computed PnL for the specified strategy.
+    """
+    pnl = conn.execute(f"SELECT {SIGNED_NOTIONAL_SQL} FROM {table} WHERE strategy = ?", (strategy_id,)).fetchone()[0]
+
+    # SUM over no rows is NULL, so return 0 if the strategy has no trades
+    return pnl if pnl is not None else 0
+
+# Example usage
+if __name__ == "__main__":
+    try:
+        # Aggregate inside SQLite instead of loading the table into pandas
+        with sqlite3.connect('trades.sqlite') as conn:
+            # One-off migration: the covering index makes the aggregations index-only scans
+            ensure_trade_indexes(conn)
+
+            sql_volume = SQL_Volume_Calculator(conn)
+            print(f"Total buy volume (SQL): {sql_volume.Buy_Volume()}")
+            print(f"Total sell volume (SQL): {sql_volume.Sell_Volume()}")
 
-    # Vectorized PnL calculation for efficiency: 
-    # Calculate PnL per trade based on whether the side is 'buy' or 'sell'.
-    def calculate_pnl(row):
-        # If it's a 'sell' order, the PnL is positive; otherwise, negative for 'buy' orders
-        return row['quantity'] * row['price'] if row['side'] == 'sell' else -row['quantity'] * row['price']
+            for strategy_id, pnl_value in compute_pnl_all_sql(conn).items():
+                print(f"The PnL of {strategy_id} (SQL) is: {pnl_value}")
 
-    # Create a new column 'pnl' in the DataFrame with the calculated values
-    df_strategy = df_strategy.assign(pnl=df_strategy.apply(calculate_pnl, axis=1))
+    except sqlite3.Error as e:
+        print(f"Error aggregating data in SQLite: {e}")
+
+# ### Streaming backend
+
+# Rough in-memory size of one trade row in a pandas chunk (two object strings, an integer and a float)
+BYTES_PER_TRADE_ROW = 256
+
+def chunksize_for_memory(max_memory_mb: float) -> int:
+    """
+    Converts a memory budget for one chunk of trades into a number of rows.
+
+    Args:
+        max_memory_mb (float): Maximum memory (in MB) one chunk may take.
+
+    Returns:
+        int: The number of rows per chunk (at least 1).
+    """
+    return max(1, int(max_memory_mb * 1024 * 1024) // BYTES_PER_TRADE_ROW)
+
+def stream_aggregates(conn: sqlite3.Connection, table: str = 'epex_12_20_12_13',
+                      chunksize: int = 100_000, max_memory_mb: float = None) -> Trade_Aggregates:
+    """
+    Computes the volumes and per-strategy PnL of a trades table by streaming it in bounded chunks.
+
+    Only one chunk is held in memory at a time: each chunk is folded into running buy/sell volume
+    and PnL accumulators and then dropped, so tables larger than RAM can be aggregated. The result
+    answers Buy_Volume(), Sell_Volume() and pnl(strategy_id) like the in-memory calculators.
+
+    Args:
+        conn (sqlite3.Connection): An open connection to the trades database.
+        table (str): Name of the trades table (must have 'strategy', 'side', 'quantity', 'price' columns).
+        chunksize (int): Number of rows read per chunk.
+        max_memory_mb (float): If given, overrides chunksize so that one chunk stays within this many MB.
+
+    Returns:
+        Trade_Aggregates: The aggregates of the whole table.
+    """
+    if max_memory_mb is not None:
+        chunksize = chunksize_for_memory(max_memory_mb)
+
+    aggregates = Trade_Aggregates()
+
+    # read_sql_query with a chunksize fetches rows from the cursor lazily, one chunk at a time
+    chunks = pd.read_sql_query(f"SELECT strategy, side, quantity, price FROM {table}", conn, chunksize=chunksize)
+    for chunk in chunks:
+        aggregates.update(chunk)
+
+    return aggregates
+
+# Example usage
+if __name__ == "__main__":
+    try:
+        # Stream the table in chunks of at most 64 MB instead of loading it all at once
+        with sqlite3.connect('trades.sqlite') as conn:
+            streamed = stream_aggregates(conn, max_memory_mb=64)
+            print(f"Total buy volume (streamed): {streamed.Buy_Volume()}")
+            print(f"Total sell volume (streamed): {streamed.Sell_Volume()}")
 
-    # Calculate the total PnL by summing the 'pnl' column
-    pnl = df_strategy['pnl'].sum()
+            for strategy_id, pnl_value in streamed.pnl_by_strategy.items():
+                print(f"The PnL of {strategy_id} (streamed) is: {pnl_value}")
 
-    # Return the PnL, ensuring it's 0 if no valid data is present (NaN)
-    return pnl if pd.notna(pnl) else 0
+    except sqlite3.Error as e:
+        print(f"Error streaming data from SQLite: {e}")
 
 # Example usage
 if __name__ == "__main__":
@@ -110,14 +415,10 @@ if __name__ == "__main__":
         trades_df = pd.read_sql("SELECT * FROM epex_12_20_12_13",
                                 "sqlite:///trades.sqlite")  # SQLite database path
         
-        # Compute the PnL for different strategies
-        strategy_id = 'strategy_1'
-        pnl_value = compute_pnl(strategy_id, trades_df)
-        print(f"The PnL of {strategy_id} is: {pnl_value}")
-
-        strategy_id = 'strategy_2'
-        pnl_value = compute_pnl(strategy_id, trades_df)
-        print(f"The PnL of {strategy_id} is: {pnl_value}")
+        # Compute the PnL of all strategies with a single pass over the trades
+        pnl_by_strategy = compute_pnl_all(trades_df)
+        for strategy_id, pnl_value in pnl_by_strategy.items():
+            print(f"The PnL of {strategy_id} is: {pnl_value}")
     
     except Exception as e:
         print(f"Error reading data from SQLite: {e}")
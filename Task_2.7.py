@@ -1,13 +1,32 @@
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
 from datetime import datetime
 import statsmodels.api as sm
-
-# Load raw data from the Excel file and inspect its structure
-raw_data = pd.read_excel('analysis_task_data.xlsx')
+from analysis_data import MemoryReport, load_analysis_data
+from pnl_bootstrap import block_bootstrap
+from report_rendering import REPORT_FORMATS, ReportRenderer
+from signal_evaluation import evaluate_signals, strategy_pnl
+from trading_features import FEATURE_COLUMNS, feature_frame, lag_columns
+from walk_forward import walk_forward_ols
+
+# Command-line options: --report DIR renders the plots to files (headless) instead of showing them.
+# Unknown arguments are ignored, so the script can also be imported or run under pytest or Jupyter.
+parser = argparse.ArgumentParser(description="Task 2.7: building a trading strategy", allow_abbrev=False)
+parser.add_argument('--report', metavar='DIR', help="Render the plots to files in DIR instead of showing them")
+parser.add_argument('--report-formats', nargs='+', default=list(REPORT_FORMATS), help="File formats of the rendered plots")
+parser.add_argument('--lean', action='store_true', help="Downcast the forecasts and prices to float32 to save memory")
+parser.add_argument('--memory-report', action='store_true', help="Print the memory footprint of every stage")
+args, _ = parser.parse_known_args()
+memory_report = MemoryReport()
+
+# Load raw data from the cached columnar copy of the Excel file ('time' is already parsed) and inspect its structure
+raw_data = load_analysis_data('analysis_task_data.xlsx', lean=args.lean)
 df = raw_data
+if args.memory_report:
+    memory_report.record('raw data', df)
 
 # Display the number of rows and columns in the dataset
 num_rows = df.shape[0]
@@ -19,46 +38,20 @@ print("Number of columns:", num_cols)
 
 # ### Task 2.7.1: Data Handling & Cleaning
 
-# Convert the 'time' column to datetime format
-df['time'] = pd.to_datetime(df['time'], format='%d/%m/%y %H:%M')
-
-# Select the relevant columns for analysis
-selected_columns = [
-    'time',
-    'Intraday Price Hourly  [in EUR/MWh]',
-    'Day Ahead Price hourly [in EUR/MWh]',
-    'Wind Day Ahead Forecast [in MW]',
-    'PV Day Ahead Forecast [in MW]',
-]
-
-# Create a new DataFrame with the selected columns
-d1 = df[selected_columns]
-
-# Rename columns for better readability
-new_column_names = {
-    'time': 'Day T',
-    'Wind Day Ahead Forecast [in MW]': 'Wind DA Forecast (MW)',
-    'PV Day Ahead Forecast [in MW]': 'PV DA Forecast (MW)',
-    'Day Ahead Price hourly [in EUR/MWh]': 'DA Price (EUR/MWh)',
-    'Intraday Price Hourly  [in EUR/MWh]': 'Intra Price (EUR/MWh)',
-}
-
-# Apply new column names to the DataFrame
-d1 = d1.rename(columns=new_column_names)
-
-# Shift the 'Day T' and 'Intra Price' columns for prediction
-d1['Day T+1'] = d1['Day T'].shift(-96)  # Shift by 96 rows for hourly prediction
-d1['Intra T+1 Price (EUR/MWh)'] = d1['Intra Price (EUR/MWh)'].shift(-96)
-
-# Reorder columns for better clarity
-new_order = ['Day T+1', 'Intra T+1 Price (EUR/MWh)'] + [col for col in d1.columns if col not in ['Day T+1', 'Intra T+1 Price (EUR/MWh)']]
-d1 = d1[new_order]
+# Feature frame: the renamed model inputs plus the next-day values for prediction, taken at the same
+# wall-clock quarter-hour on the next day (aligned by timestamp, not 96 rows later, so the 92 and 100
+# quarter-hour DST days don't misalign the rest of the year); see trading_features.feature_frame
+d1 = feature_frame(df)
 d1.head(100)
+if args.memory_report:
+    memory_report.record('2.7.1 d1', d1)
 
 # ### Task 2.7.2: Prediction using OLS Method
 
-# Remove rows with missing 'Intra T+1 Price' data
+# Remove rows with missing 'Intra T+1 Price' data (the cleaned frame is reused by the later tasks)
 d1_cleaned = d1.dropna(subset=['Intra T+1 Price (EUR/MWh)'])
+if args.memory_report:
+    memory_report.record('2.7.2 d1_cleaned', d1_cleaned)
 
 # Define independent variables (features) and dependent variable (target)
 X = d1_cleaned[['Intra Price (EUR/MWh)', 'DA Price (EUR/MWh)', 'Wind DA Forecast (MW)', 'PV DA Forecast (MW)']]
@@ -80,28 +73,11 @@ print(fitted_values)
 
 # ### Task 2.7.3: P/l using OLS Method Fitted Values
 
-# Initialize 'buy', 'sell', and 'P/L' columns in the cleaned DataFrame
-d1_cleaned.loc[:, 'buy'] = pd.NA
-d1_cleaned.loc[:, 'sell'] = pd.NA
-d1_cleaned.loc[:, 'P/L'] = pd.NA
-
-# Define conditions for buying and selling based on fitted values and DA price
-condition_buy_at_da = fitted_values > d1_cleaned['DA Price (EUR/MWh)']
-condition_buy_at_intra = fitted_values < d1_cleaned['DA Price (EUR/MWh)']
-
-# If fitted value > DA Price, buy at DA Price and sell at Intra Price
-d1_cleaned.loc[condition_buy_at_da, 'buy'] = d1_cleaned.loc[condition_buy_at_da, 'DA Price (EUR/MWh)']
-d1_cleaned.loc[condition_buy_at_da, 'sell'] = d1_cleaned.loc[condition_buy_at_da, 'Intra T+1 Price (EUR/MWh)']
-
-# If fitted value < DA Price, buy at Intra Price and sell at DA Price
-d1_cleaned.loc[condition_buy_at_intra, 'buy'] = d1_cleaned.loc[condition_buy_at_intra, 'Intra T+1 Price (EUR/MWh)']
-d1_cleaned.loc[condition_buy_at_intra, 'sell'] = d1_cleaned.loc[condition_buy_at_intra, 'DA Price (EUR/MWh)']
-
-# Calculate profit/loss (P/L) as the difference between 'sell' and 'buy' prices
-d1_cleaned['P/L'] = (d1_cleaned['sell'] - d1_cleaned['buy']) / 4 # Divide by 4 since the DA and Intra Price is constant accross the hour
-
-# Replace NaN values in 'P/L' with 0 where no trade occurred
-d1_cleaned['P/L'] = d1_cleaned['P/L'].fillna(0)
+# If fitted value > DA Price, buy at DA Price and sell at Intra T+1 Price; if fitted value < DA Price, the reverse.
+# The rule is evaluated with float arrays in one vectorized pass; 'P/L' is 0 where no trade occurred
+d1_cleaned[['buy', 'sell', 'P/L']] = strategy_pnl(
+    fitted_values, d1_cleaned['DA Price (EUR/MWh)'], d1_cleaned['Intra T+1 Price (EUR/MWh)']
+).to_numpy()
 
 # Sum the numerical columns to get overall performance metrics
 pd.set_option('display.float_format', '{:.2f}'.format)
@@ -116,8 +92,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 
-# Re-clean the data and define features and target variable
-d1_cleaned = d1.dropna(subset=['Intra T+1 Price (EUR/MWh)'])
+# Define features and target variable on the cleaned data of Task 2.7.2 (its 'buy'/'sell'/'P/L' columns are reset in Task 2.7.5)
 X = d1_cleaned[['Intra Price (EUR/MWh)', 'DA Price (EUR/MWh)', 'Wind DA Forecast (MW)', 'PV DA Forecast (MW)']]
 y = d1_cleaned['Intra T+1 Price (EUR/MWh)']
 
@@ -157,32 +132,26 @@ print(fitted_values_rf)
 
 # ### Task 2.7.5: P/l using Random Forest Regression Fitted Values
 
-# Implement the buy/sell decision logic based on Random Forest predictions
-d1_cleaned.loc[:, 'buy'] = pd.NA
-d1_cleaned.loc[:, 'sell'] = pd.NA
-d1_cleaned.loc[:, 'P/L'] = pd.NA
-
-# Buy at DA Price if RF prediction > DA Price, else sell at Intra Price
-condition_buy_at_da_rf = fitted_values_rf > d1_cleaned['DA Price (EUR/MWh)']
-condition_buy_at_intra_rf = fitted_values_rf < d1_cleaned['DA Price (EUR/MWh)']
-
-# Apply the buy/sell logic for trades based on the RF model predictions
-d1_cleaned.loc[condition_buy_at_da_rf, 'buy'] = d1_cleaned.loc[condition_buy_at_da_rf, 'DA Price (EUR/MWh)']
-d1_cleaned.loc[condition_buy_at_da_rf, 'sell'] = d1_cleaned.loc[condition_buy_at_da_rf, 'Intra T+1 Price (EUR/MWh)']
-
-# Reverse the logic for the opposite scenario
-d1_cleaned.loc[condition_buy_at_intra_rf, 'buy'] = d1_cleaned.loc[condition_buy_at_intra_rf, 'Intra T+1 Price (EUR/MWh)']
-d1_cleaned.loc[condition_buy_at_intra_rf, 'sell'] = d1_cleaned.loc[condition_buy_at_intra_rf, 'DA Price (EUR/MWh)']
-
-# Calculate profit/loss (P/L) for trades based on Random Forest predictions
-d1_cleaned['P/L'] = (d1_cleaned['sell'] - d1_cleaned['buy']) / 4  # Divide by 4 since the DA and Intra Price is constant accross the hour
-d1_cleaned['P/L'] = d1_cleaned['P/L'].fillna(0)
+# Apply the same buy/sell rule to the Random Forest predictions
+d1_cleaned[['buy', 'sell', 'P/L']] = strategy_pnl(
+    fitted_values_rf, d1_cleaned['DA Price (EUR/MWh)'], d1_cleaned['Intra T+1 Price (EUR/MWh)']
+).to_numpy()
 
 # Calculate and print overall strategy performance
 pd.set_option('display.float_format', '{:.2f}'.format)
 numeric_columns = d1_cleaned.select_dtypes(include=[np.number]).columns
 sum_result = d1_cleaned[numeric_columns].sum()
 print(sum_result)
+if args.memory_report:
+    memory_report.record('2.7.5 d1_cleaned', d1_cleaned)
+
+# Compare both models in one pass: P/L, trades, win rate and max drawdown of every model at once
+_, model_comparison = evaluate_signals(
+    np.vstack([fitted_values, fitted_values_rf]),
+    d1_cleaned['DA Price (EUR/MWh)'], d1_cleaned['Intra T+1 Price (EUR/MWh)'],
+    model_names=['OLS', 'Random Forest'],
+)
+print(model_comparison.to_string())
 
 # ### Task 2.7.6: Comparing OLS vs RF for out-of-sample-data
 
@@ -220,22 +189,27 @@ print(comparison_df)
 
 # ### Task 2.7.7: Visualising the P/L over time (RF data only)
 
-# Calculate cumulative P/L in EUR 
-d1_cleaned = d1_cleaned.copy()
+# Calculate cumulative P/L in EUR (added in place to the cleaned frame)
 d1_cleaned['Cumulative_PL'] = d1_cleaned['P/L'].cumsum()
 
 # Visualize the cumulative profit/loss over time
 def format_yaxis(value, tick_pos):
     return f'{int(value):,}'
 
-plt.figure(figsize=(12, 6))
-plt.plot(d1_cleaned['Day T'], d1_cleaned['Cumulative_PL'], color='blue')
-plt.title('Cumulative P/L Over Time')
-plt.xlabel('Date')
-plt.ylabel('Cumulative P/L (EUR)')
-plt.gca().yaxis.set_major_formatter(FuncFormatter(format_yaxis))
-plt.grid(True)
-plt.show()
+if args.report:
+    # Rendered in the background from a shape-preserving downsample of the ~35k quarter-hour points
+    renderer = ReportRenderer(args.report, args.report_formats)
+    renderer.line_chart('cumulative_pl', [(d1_cleaned['Day T'], d1_cleaned['Cumulative_PL'], None, 'blue')],
+                        'Cumulative P/L Over Time', 'Date', 'Cumulative P/L (EUR)', thousands_yaxis=True)
+else:
+    plt.figure(figsize=(12, 6))
+    plt.plot(d1_cleaned['Day T'], d1_cleaned['Cumulative_PL'], color='blue')
+    plt.title('Cumulative P/L Over Time')
+    plt.xlabel('Date')
+    plt.ylabel('Cumulative P/L (EUR)')
+    plt.gca().yaxis.set_major_formatter(FuncFormatter(format_yaxis))
+    plt.grid(True)
+    plt.show()
 
 # Output key performance metrics for the strategy
 total_pl = d1_cleaned['Cumulative_PL'].iloc[-1]
@@ -249,3 +223,34 @@ print(f"Total P/L: €{total_pl:,.2f}")
 print(f"Maximum Drawdown: €{max_drawdown:,.2f}")
 print(f"Number of Trades: {total_trades}")
 print(f"Win Rate: {win_rate:.2f}%")
+
+# ### Task 2.7.8: Walk-forward OLS backtest (out-of-sample)
+
+# The P/L of Task 2.7.3 trades on in-sample fitted values. Here every day is predicted by an OLS model
+# refitted (incrementally) on the data available before that day only, with an expanding window.
+walk_forward_results = walk_forward_ols(d1, window_days=None, min_train_days=7)
+print(f"\nWalk-forward OLS Backtest (out-of-sample)")
+print(f"Days predicted: {walk_forward_results.loc[walk_forward_results['prediction'].notna(), 'Day T'].dt.normalize().nunique()}")
+print(f"Total P/L: €{walk_forward_results['P/L'].sum():,.2f}")
+
+# The same backtest with the intraday price of the same quarter-hour on each of the last 7 days as extra
+# features (aligned by timestamp across DST days, built from one strided view of the price series)
+d1_lagged = feature_frame(df, lag_days=7)
+walk_forward_lagged = walk_forward_ols(d1_lagged, min_train_days=7, features=FEATURE_COLUMNS + lag_columns(7))
+print(f"Total P/L with 7 daily lags of the intraday price: €{walk_forward_lagged['P/L'].sum():,.2f}")
+
+# ### Task 2.7.9: Robustness of the RF P/L (block bootstrap by day)
+
+# Resample whole days of the Task 2.7.7 P/L with replacement to see how much the metrics depend on the realised path
+_, bootstrap_summary = block_bootstrap(d1_cleaned['P/L'], d1_cleaned['Day T'].dt.normalize(), num_resamples=10000)
+print(f"\nBootstrap of the RF P/L (10,000 resamples of days, 95% intervals)")
+print(bootstrap_summary.to_string(float_format='{:,.2f}'.format))
+
+if args.report:
+    print("\nReport files:", ', '.join(renderer.close()))
+
+if args.memory_report:
+    memory_report.record('2.7.7 d1_cleaned', d1_cleaned)
+    print("\nMemory footprint per stage:")
+    # Snapshots of the same growing frame, so their total would count the shared columns several times
+    print(memory_report.render(total=False))
@@ -1,294 +1,345 @@
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from analysis_data import DATA_FILE, MemoryReport, load_analysis_data, add_calendar_features, file_hash
+from analysis_pipeline import Pipeline, STAGE_CACHE_DIR
+from energy_analysis import POWER_COLUMNS, PRICE_COLUMNS, hourly_energy
+from battery import best_daily_arbitrage
+from report_rendering import REPORT_FORMATS, ReportRenderer
 
 # ## Task 2: Data analysis and building a trading strategy
 
-raw_data = pd.read_excel('analysis_task_data.xlsx')
-df = raw_data
+# Each task is a named stage of a lazy pipeline: run(stages=['2.6']) computes only what 2.6 needs,
+# and results are memoized on disk keyed by the hash of the input workbook.
 
-num_rows = df.shape[0]
-num_cols = df.shape[1]
+def load_data(path: str = DATA_FILE, lean: bool = False) -> pd.DataFrame:
+    """
+    Loads the analysis data and adds the calendar features.
 
-print("Number of rows:", num_rows)
-print("Number of columns:", num_cols)
-print()  
+    Args:
+        path (str): Path to the analysis workbook.
+        lean (bool): Whether to downcast the forecasts and prices to float32 (see lean_dtypes).
 
-# ### Task 2.1 - Total Power Forecast Calculator
-
-# Convert the 'hour' column into a datetime format (if not already in datetime format)
-df['time'] = pd.to_datetime(df['time'], format='%d/%m/%y %H:%M')
-
-# Extract the 'hour' and 'date' from the 'time' column
-df['date'] = df['time'].dt.date  # Extract just the date part (YYYY-MM-DD)
-df['hour'] = df['time'].dt.hour  # Extract the hour part (0-23)
-
-# Custom aggregation function that handles DST changes
-def mw_to_mwh(x):
-    # Count actual intervals in a specific hour
-    num_intervals = len(x)
-    # Calculate hours per interval for the specific hour
-    hours_per_interval = 1 / num_intervals
-    # Calculate MWh
-    return x.sum() * hours_per_interval
-
-# Group by 'date' and 'hour' with the custom aggregation
-df_hourly = df.groupby(['date', 'hour']).agg({
-    'Wind Day Ahead Forecast [in MW]': mw_to_mwh,
-    'Wind Intraday Forecast [in MW]': mw_to_mwh,
-    'PV Day Ahead Forecast [in MW]': mw_to_mwh,
-    'PV Intraday Forecast [in MW]': mw_to_mwh,
-    'Day Ahead Price hourly [in EUR/MWh]': 'mean',
-    'Intraday Price Hourly  [in EUR/MWh]': 'mean',
-}).reset_index()
-
-# Rename columns to reflect MWh units
-new_columns = {
-    'Wind Day Ahead Forecast [in MW]': 'Wind Day Ahead Forecast [in MWh]',
-    'Wind Intraday Forecast [in MW]': 'Wind Intraday Forecast [in MWh]',
-    'PV Day Ahead Forecast [in MW]': 'PV Day Ahead Forecast [in MWh]',
-    'PV Intraday Forecast [in MW]': 'PV Intraday Forecast [in MWh]'
-}
-df_hourly = df_hourly.rename(columns=new_columns)
-
-# Print the results
-print("Task 2.1 - Total Power Forecast Calculator Results:")
-print(df_hourly)
-print()  
-
-# ### Task 2.2 - Average Hourly Wind/Solar production
-
-# Extract the hour from the 'date' column
-df['hour'] = df['time'].dt.hour
+    Returns:
+        pd.DataFrame: The quarter-hourly data with 'date', 'hour', 'quarter_hour', 'dayofweek', 'is_weekend' and 'is_holiday'.
+    """
+    # Load the data from the cached columnar copy of the workbook ('time' is already parsed)
+    df = load_analysis_data(path, lean=lean)
 
-# Calculate the average for each hour across all days (365 days)
-df_hourly_avg = df.groupby('hour').agg({
-    'Wind Day Ahead Forecast [in MW]': lambda x: x.mean() * 4,
-    'Wind Intraday Forecast [in MW]': lambda x: x.mean() * 4,
-    'PV Day Ahead Forecast [in MW]': lambda x: x.mean() * 4,
-    'PV Intraday Forecast [in MW]': lambda x: x.mean() * 4,
-}).reset_index()
+    print("Number of rows:", df.shape[0])
+    print("Number of columns:", df.shape[1])
+    print()
 
-# Print the results
-print("Task 2.2 - Average Hourly Wind/Solar Production Results:")
-print(df_hourly_avg)
-print()  
+    # Build the calendar features once, vectorized from the 'time' column; every Task 2 analysis reuses them
+    return add_calendar_features(df)
 
-# ### Task 2.3 - Average Value of Wind/Solar Power
-
-# Calculate the value in EUR for Wind and PV
-df_hourly['Wind Value (EUR)'] = df_hourly['Wind Day Ahead Forecast [in MWh]'] * df_hourly['Day Ahead Price hourly [in EUR/MWh]'] 
-df_hourly['PV Value (EUR)'] = df_hourly['PV Day Ahead Forecast [in MWh]'] * df_hourly['Day Ahead Price hourly [in EUR/MWh]'] 
-
-# Sum the total value (in EUR) for Wind and PV for the entire year
-total_wind_value = df_hourly['Wind Value (EUR)'].sum()
-total_pv_value = df_hourly['PV Value (EUR)'].sum()
+# ### Task 2.1 - Total Power Forecast Calculator
 
-# Sum the total forecasted power for Wind and PV for the entire year
-total_wind_forecast = df_hourly['Wind Day Ahead Forecast [in MWh]'].sum()
-total_pv_forecast = df_hourly['PV Day Ahead Forecast [in MWh]'].sum()
+def hourly_aggregation(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregates the forecasts to MWh and the prices to means per date and hour.
+    """
+    # Grouped sum/count reductions (the count of intervals per hour handles DST changes)
+    return hourly_energy(df, POWER_COLUMNS, PRICE_COLUMNS)
 
-# Calculate the average value (in EUR/MWh) for Wind and PV
-avg_wind_value_per_mwh = total_wind_value / total_wind_forecast
-avg_pv_value_per_mwh = total_pv_value / total_pv_forecast
+def print_hourly_aggregation(df_hourly: pd.DataFrame) -> None:
+    print("Task 2.1 - Total Power Forecast Calculator Results:")
+    print(df_hourly)
+    print()
 
-# Calculate the overall average Day Ahead price
-avg_da_price = df_hourly['Day Ahead Price hourly [in EUR/MWh]'].mean()
+# ### Task 2.2 - Average Hourly Wind/Solar production
 
-# Print the results
-print("Task 2.3 - Average Value of Wind/Solar Power Results:")
-print(f"Average Day Ahead Price: {avg_da_price:.2f} EUR/MWh")
-print(f"Average Wind Value per MWh: {avg_wind_value_per_mwh:.2f} EUR/MWh")
-print(f"Average PV Value per MWh: {avg_pv_value_per_mwh:.2f} EUR/MWh")
+def hourly_profile(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculates the average forecast for each hour of the day across all days.
+    """
+    # Mean of the quarter-hourly values of each hour, times 4 as in the original analysis
+    df_hourly_avg = df.groupby('hour')[POWER_COLUMNS].mean() * 4
+    return df_hourly_avg.reset_index()
+
+def print_hourly_profile(df_hourly_avg: pd.DataFrame) -> None:
+    print("Task 2.2 - Average Hourly Wind/Solar Production Results:")
+    print(df_hourly_avg)
+    print()
+
+def data_period(df: pd.DataFrame) -> str:
+    """
+    Returns the years covered by the data (quarter-hourly or hourly, with a 'date' column), e.g. '2021' or '2021-2023'.
+    """
+    years = df['date'].dt.year
+    return f"{years.min()}" if years.min() == years.max() else f"{years.min()}-{years.max()}"
+
+# Lines of the Task 2.2 plot: (column, label, color)
+HOURLY_PROFILE_LINES = [
+    ('Wind Day Ahead Forecast [in MW]', 'Wind Day Ahead', 'blue'),
+    ('Wind Intraday Forecast [in MW]', 'Wind Intraday', 'green'),
+    ('PV Day Ahead Forecast [in MW]', 'PV Day Ahead', 'orange'),
+    ('PV Intraday Forecast [in MW]', 'PV Intraday', 'red'),
+]
+
+def _hourly_profile_title(period: str = None) -> str:
+    return 'Average Hourly Wind and Solar Production' + (f' for {period}' if period else '')
+
+def plot_hourly_profile(df_hourly_avg: pd.DataFrame, period: str = None):
+    """
+    Plots the average hourly wind and solar production of Task 2.2.
+
+    Args:
+        df_hourly_avg (pd.DataFrame): The average production per hour of the day (from Task 2.2).
+        period (str): The period covered, e.g. '2021', shown in the title.
+
+    Returns:
+        matplotlib.figure.Figure: The figure.
+    """
+    # Plot the results
+    fig = plt.figure(figsize=(20, 6))
+
+    # Plot each line with a different color and label
+    for column, label, color in HOURLY_PROFILE_LINES:
+        plt.plot(df_hourly_avg['hour'], df_hourly_avg[column], label=label, color=color)
+
+    # Add labels and title
+    plt.xlabel('Hour of the Day')
+    plt.ylabel('Average Forecasted Power (in MW)')
+    plt.title(_hourly_profile_title(period))
+
+    # Add a grid for better readability
+    plt.grid(True)
+
+    # Add a legend to the plot
+    plt.legend(title="Forecast Type")
+    return fig
+
+def render_hourly_profile(renderer: ReportRenderer, df_hourly_avg: pd.DataFrame, period: str = None):
+    """
+    Queues the Task 2.2 plot for headless rendering to files ('hourly_profile.png', ...).
+
+    Args:
+        renderer (ReportRenderer): The report renderer.
+        df_hourly_avg (pd.DataFrame): The average production per hour of the day (from Task 2.2).
+        period (str): The period covered, e.g. '2021', shown in the title.
+
+    Returns:
+        concurrent.futures.Future: The future list of written file paths.
+    """
+    lines = [(df_hourly_avg['hour'], df_hourly_avg[column], label, color) for column, label, color in HOURLY_PROFILE_LINES]
+    return renderer.line_chart('hourly_profile', lines, _hourly_profile_title(period), 'Hour of the Day',
+                               'Average Forecasted Power (in MW)', figsize=(20, 6), legend_title="Forecast Type")
 
-# Comparing average Wind/PV value with the average DA price
-if avg_wind_value_per_mwh > avg_da_price:
-    print("The average value for Wind is higher than the average DA price.")
-else:
-    print("The average value for Wind is lower than the average DA price.")
+# ### Task 2.3 - Average Value of Wind/Solar Power
 
-if avg_pv_value_per_mwh > avg_da_price:
-    print("The average value for PV is higher than the average DA price.")
-else:
-    print("The average value for PV is lower than the average DA price.")
-    
-print()  
+def value_factors(df_hourly: pd.DataFrame) -> dict:
+    """
+    Calculates the average value (in EUR/MWh) of wind and PV production and the average DA price.
+    """
+    da_price = df_hourly['Day Ahead Price hourly [in EUR/MWh]']
+
+    # Total value (in EUR) of Wind and PV divided by their total forecasted energy
+    wind = df_hourly['Wind Day Ahead Forecast [in MWh]']
+    pv = df_hourly['PV Day Ahead Forecast [in MWh]']
+    return {
+        'avg_da_price': da_price.mean(),
+        'avg_wind_value_per_mwh': (wind * da_price).sum() / wind.sum(),
+        'avg_pv_value_per_mwh': (pv * da_price).sum() / pv.sum(),
+    }
+
+def print_value_factors(values: dict) -> None:
+    avg_da_price = values['avg_da_price']
+    avg_wind_value_per_mwh = values['avg_wind_value_per_mwh']
+    avg_pv_value_per_mwh = values['avg_pv_value_per_mwh']
+
+    print("Task 2.3 - Average Value of Wind/Solar Power Results:")
+    print(f"Average Day Ahead Price: {avg_da_price:.2f} EUR/MWh")
+    print(f"Average Wind Value per MWh: {avg_wind_value_per_mwh:.2f} EUR/MWh")
+    print(f"Average PV Value per MWh: {avg_pv_value_per_mwh:.2f} EUR/MWh")
+
+    # Comparing average Wind/PV value with the average DA price
+    if avg_wind_value_per_mwh > avg_da_price:
+        print("The average value for Wind is higher than the average DA price.")
+    else:
+        print("The average value for Wind is lower than the average DA price.")
+
+    if avg_pv_value_per_mwh > avg_da_price:
+        print("The average value for PV is higher than the average DA price.")
+    else:
+        print("The average value for PV is lower than the average DA price.")
+
+    print()
 
 # ### Task 2.4 - Day with Highest and Lowest Renewable Energy Production
 
-# Calculate total renewable energy production for each day
-df['Total Renewable Day Ahead Forecast (MW)'] = (df['Wind Day Ahead Forecast [in MW]'] + df['PV Day Ahead Forecast [in MW]'])
-
-# Group by date and calculate the total renewable energy production for each day
-df_daily = df.groupby('date').agg({
-    'Total Renewable Day Ahead Forecast (MW)': 'sum',
-    'Day Ahead Price hourly [in EUR/MWh]': 'mean'
-}).reset_index()
-
-# Find the day with the highest and lowest renewable energy production
-max_renewable_day = df_daily.loc[df_daily['Total Renewable Day Ahead Forecast (MW)'].idxmax()]
-min_renewable_day = df_daily.loc[df_daily['Total Renewable Day Ahead Forecast (MW)'].idxmin()]
-
-# Extract the average Day Ahead Price for these days
-max_renewable_day_price = max_renewable_day['Day Ahead Price hourly [in EUR/MWh]']
-min_renewable_day_price = min_renewable_day['Day Ahead Price hourly [in EUR/MWh]']
-
-# Print the results
-print("Task 2.4 - Day with Highest and Lowest Renewable Energy Production Results:")
-print(f"Day with Highest Renewable Energy Production: {max_renewable_day['date']}")
-print(f"Total Renewable Production on this day: {max_renewable_day['Total Renewable Day Ahead Forecast (MW)']:.2f} MW")
-print(f"Average Day Ahead Price on this day: {max_renewable_day_price:.2f} EUR/MWh\n")
-
-print(f"Day with Lowest Renewable Energy Production: {min_renewable_day['date']}")
-print(f"Total Renewable Production on this day: {min_renewable_day['Total Renewable Day Ahead Forecast (MW)']:.2f} MW")
-print(f"Average Day Ahead Price on this day: {min_renewable_day_price:.2f} EUR/MWh\n")
-
-if max_renewable_day_price > min_renewable_day_price:
-    print("The Average Hourly DA price on the day with the highest renewable energy production is higher than the day with the lowest production.")
-else:
-    print("The Average Hourly DA price on the day with the highest renewable energy production is lower than the day with the lowest production.")
-
-print()  
+def extreme_days(df: pd.DataFrame) -> dict:
+    """
+    Finds the days with the highest and the lowest renewable energy production.
+
+    Returns:
+        dict: The 'max' and 'min' days as rows with 'date', 'Total Renewable Day Ahead Forecast (MW)'
+        and the average 'Day Ahead Price hourly [in EUR/MWh]'.
+    """
+    # Group by date and sum the wind and PV forecasts (and average the price) for each day in one grouped reduction
+    df_daily = df.groupby('date').agg({
+        'Wind Day Ahead Forecast [in MW]': 'sum',
+        'PV Day Ahead Forecast [in MW]': 'sum',
+        'Day Ahead Price hourly [in EUR/MWh]': 'mean'
+    }).reset_index()
+
+    # Calculate total renewable energy production for each day
+    df_daily['Total Renewable Day Ahead Forecast (MW)'] = df_daily['Wind Day Ahead Forecast [in MW]'] + df_daily['PV Day Ahead Forecast [in MW]']
+
+    # Find the day with the highest and lowest renewable energy production
+    return {
+        'max': df_daily.loc[df_daily['Total Renewable Day Ahead Forecast (MW)'].idxmax()],
+        'min': df_daily.loc[df_daily['Total Renewable Day Ahead Forecast (MW)'].idxmin()],
+    }
+
+def print_extreme_days(days: dict) -> None:
+    max_renewable_day, min_renewable_day = days['max'], days['min']
+
+    # Extract the average Day Ahead Price for these days
+    max_renewable_day_price = max_renewable_day['Day Ahead Price hourly [in EUR/MWh]']
+    min_renewable_day_price = min_renewable_day['Day Ahead Price hourly [in EUR/MWh]']
+
+    print("Task 2.4 - Day with Highest and Lowest Renewable Energy Production Results:")
+    print(f"Day with Highest Renewable Energy Production: {max_renewable_day['date']:%Y-%m-%d}")
+    print(f"Total Renewable Production on this day: {max_renewable_day['Total Renewable Day Ahead Forecast (MW)']:.2f} MW")
+    print(f"Average Day Ahead Price on this day: {max_renewable_day_price:.2f} EUR/MWh\n")
+
+    print(f"Day with Lowest Renewable Energy Production: {min_renewable_day['date']:%Y-%m-%d}")
+    print(f"Total Renewable Production on this day: {min_renewable_day['Total Renewable Day Ahead Forecast (MW)']:.2f} MW")
+    print(f"Average Day Ahead Price on this day: {min_renewable_day_price:.2f} EUR/MWh\n")
+
+    if max_renewable_day_price > min_renewable_day_price:
+        print("The Average Hourly DA price on the day with the highest renewable energy production is higher than the day with the lowest production.")
+    else:
+        print("The Average Hourly DA price on the day with the highest renewable energy production is lower than the day with the lowest production.")
+
+    print()
 
 # ### Task 2.5 - Weekend vs Weekday Day Ahead Prices
 
-# Identify the actual day on the date
-df['day_of_week'] = df['date'].apply(lambda x: x.strftime('%A'))  # Get full day name
-
-# Identify if it's a weekday (Mon-Fri) or weekend (Sat-Sun)
-df['is_weekend'] = df['day_of_week'].apply(lambda x: 'Weekend' if x in ['Saturday', 'Sunday'] else 'Weekday')
-
-# Calculate the average hourly Day Ahead Price for weekdays vs weekends
-average_price_by_day_type = df.groupby('is_weekend')['Day Ahead Price hourly [in EUR/MWh]'].mean()
-
-# Print the results
-avg_weekday_price = average_price_by_day_type['Weekday']
-avg_weekend_price = average_price_by_day_type['Weekend']
-print("Task 2.5 - Weekend vs Weekday Day Ahead Prices Results:")
-print(f"Average Hourly Day Ahead Price during Weekdays: {avg_weekday_price:.2f} EUR/MWh")
-print(f"Average Hourly Day Ahead Price during Weekends: {avg_weekend_price:.2f} EUR/MWh")
-print()
+def weekday_split(df: pd.DataFrame) -> dict:
+    """
+    Calculates the average hourly Day Ahead Price for weekdays (Mon-Fri) and weekends (Sat-Sun).
+    A day type the data doesn't cover (e.g. a period of weekdays only) is NaN.
+    """
+    # Group on the precomputed 'is_weekend' flag
+    average_price_by_day_type = df.groupby('is_weekend')['Day Ahead Price hourly [in EUR/MWh]'].mean()
+    return {
+        'weekday': average_price_by_day_type.get(False, np.nan),
+        'weekend': average_price_by_day_type.get(True, np.nan),
+    }
+
+def print_weekday_split(prices: dict) -> None:
+    print("Task 2.5 - Weekend vs Weekday Day Ahead Prices Results:")
+    print(f"Average Hourly Day Ahead Price during Weekdays: {prices['weekday']:.2f} EUR/MWh")
+    print(f"Average Hourly Day Ahead Price during Weekends: {prices['weekend']:.2f} EUR/MWh")
+    print()
 
 # ### Task 2.6 - Revenue from Battery Charging and Discharging (Maximizing Revenue)
 
-# Initialize the daily_prices DataFrame with the 'date' column
-daily_prices = pd.DataFrame({
-    'date': df['date'].unique() 
-})
-
-# Initialize the columns in daily_prices
-daily_prices['revenue'] = 0
-daily_prices['max_price'] = 0
-daily_prices['max_hour'] = 0
-daily_prices['min_price'] = 0
-daily_prices['min_hour'] = 0
-
-# Iterate over each day to calculate the revenue-maximizing pair
-for i, row in daily_prices.iterrows():
-    date = row['date']
-    
-    # Filter data for the current date
-    day_data = df_hourly[df_hourly['date'] == date]
-    
-    # Filter out any negative prices for max_price (as you cannot discharge at negative prices)
-    day_data_positive_prices = day_data[day_data['Day Ahead Price hourly [in EUR/MWh]'] > 0]
-    
-    # If no positive prices are found for the day, skip the iteration
-    if day_data_positive_prices.empty:
-        continue
-    
-    # Find the top 12 maximum positive prices and their corresponding hours
-    sorted_day_data = day_data_positive_prices.sort_values(by='Day Ahead Price hourly [in EUR/MWh]', ascending=False)
-    
-    # Limit to the top 12 prices, or fewer if there are not enough available hours
-    top_12_prices = sorted_day_data.head(12)
-    
-    # Variables to store the best revenue pair for the day
-    best_revenue = -float('inf')  # Start with a very low revenue
-    best_max_price = None
-    best_max_hour = None
-    best_min_price = None
-    best_min_hour = None
-    
-    # For each of the top 12 max prices, find the min price in the hours before the max hour
-    for _, top_row in top_12_prices.iterrows():
-        max_price = top_row['Day Ahead Price hourly [in EUR/MWh]']
-        max_hour = top_row['hour']
-        
-        # Get the data for the hours before the max hour to calculate the min price
-        previous_hours = day_data[day_data['hour'] < max_hour]
-        
-        # If there are valid previous hours, calculate the min price
-        if not previous_hours.empty:
-            # Do not filter out negative prices. Allow negative values to be considered.
-            min_price = previous_hours['Day Ahead Price hourly [in EUR/MWh]'].min()
-            
-            # Find the hour corresponding to the minimum price
-            min_hour = previous_hours[previous_hours['Day Ahead Price hourly [in EUR/MWh]'] == min_price]['hour'].values[0]
-            
-            # Calculate the revenue for this max-min pair
-            revenue = max_price - min_price
-            
-            # If this revenue is the highest, update the best pair
-            if revenue > best_revenue:
-                best_revenue = revenue
-                best_max_price = max_price
-                best_max_hour = max_hour
-                best_min_price = min_price
-                best_min_hour = min_hour
-    
-    # Update the daily_prices DataFrame with the best pair for this day
-    daily_prices.at[i, 'max_price'] = best_max_price
-    daily_prices.at[i, 'max_hour'] = best_max_hour
-    daily_prices.at[i, 'min_price'] = best_min_price
-    daily_prices.at[i, 'min_hour'] = best_min_hour
-    daily_prices.at[i, 'revenue'] = best_revenue
-
-# Output the final DataFrame with only the required columns
-
-# Set the new column names as per your requirement
-output_columns = ['date', 'min_price', 'min_hour', 'max_price', 'max_hour', 'revenue']
-daily_prices_output = daily_prices[output_columns]
-
-# Rename the columns to the new names
-daily_prices_output = daily_prices_output.rename(columns={
-    'date': 'date',
-    'max_price': 'sell price',
-    'max_hour': 'discharge hour',
-    'min_price': 'buy price',
-    'min_hour': 'charge hour',
-    'revenue': 'revenue'
-})
-
-# Print the output
-print("Daily Prices with Revenue Maximizing Pairs:")
-print(daily_prices_output)
-
-# Optionally: Calculate the total revenue for the year
-total_revenue = daily_prices_output['revenue'].sum()
-print(f"\nTotal Revenue for the year (EUR): {total_revenue:.2f}")
-
-# ### Task 2.2 - Graphing the Results
-
-# Plot the results
-plt.figure(figsize=(20, 6))
-
-# Plot each line with a different color and label
-plt.plot(df_hourly_avg['hour'], df_hourly_avg['Wind Day Ahead Forecast [in MW]'], label='Wind Day Ahead', color='blue')
-plt.plot(df_hourly_avg['hour'], df_hourly_avg['Wind Intraday Forecast [in MW]'], label='Wind Intraday', color='green')
-plt.plot(df_hourly_avg['hour'], df_hourly_avg['PV Day Ahead Forecast [in MW]'], label='PV Day Ahead', color='orange')
-plt.plot(df_hourly_avg['hour'], df_hourly_avg['PV Intraday Forecast [in MW]'], label='PV Intraday', color='red')
-
-# Add labels and title
-plt.xlabel('Hour of the Day')
-plt.ylabel('Average Forecasted Power (in MW)')
-plt.title('Average Hourly Wind and Solar Production for 2021')
-
-# Add a grid for better readability
-plt.grid(True)
-
-# Add a legend to the plot
-plt.legend(title="Forecast Type")
-
-# Show the plot
-plt.show()
+def battery_revenue(df_hourly: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finds the revenue-maximising charge/discharge pair of hours for every day.
+    """
+    # The discharge hour is one of the day's top 12 positive prices and the charge hour is the cheapest
+    # earlier hour (negative prices allowed). All days are solved at once on a days x 24 price matrix.
+    return best_daily_arbitrage(df_hourly, 'Day Ahead Price hourly [in EUR/MWh]', top_n=12)
+
+def print_battery_revenue(daily_prices_output: pd.DataFrame) -> None:
+    print("Daily Prices with Revenue Maximizing Pairs:")
+    print(daily_prices_output)
+
+    # Calculate the total revenue for the year
+    total_revenue = daily_prices_output['revenue'].sum()
+    print(f"\nTotal Revenue for the year (EUR): {total_revenue:.2f}")
+
+# ### Pipeline
+
+# Stage name -> (function, stages it depends on, function printing its result)
+STAGES = {
+    '2.1': (hourly_aggregation, ('data',), print_hourly_aggregation),
+    '2.2': (hourly_profile, ('data',), print_hourly_profile),
+    '2.3': (value_factors, ('2.1',), print_value_factors),
+    '2.4': (extreme_days, ('data',), print_extreme_days),
+    '2.5': (weekday_split, ('data',), print_weekday_split),
+    '2.6': (battery_revenue, ('2.1',), print_battery_revenue),
+}
+
+def build_pipeline(path: str = DATA_FILE, cache_dir: str = STAGE_CACHE_DIR, lean: bool = False,
+                   memory_report: MemoryReport = None) -> Pipeline:
+    """
+    Builds the Task 2 pipeline for one input workbook.
+
+    Args:
+        path (str): Path to the analysis workbook.
+        cache_dir (str): Directory of the memoized stage results, None to memoize in memory only.
+        lean (bool): Whether to run on the memory-lean (float32) data; its results are memoized separately.
+        memory_report (MemoryReport): Collects the memory footprint of every stage result, if given.
+
+    Returns:
+        Pipeline: The pipeline, with the 'data' stage, one stage per task and the 'period' stage.
+    """
+    input_key = file_hash(path) + (':lean' if lean else '')
+    pipeline = Pipeline(input_key=input_key, cache_dir=cache_dir, memory_report=memory_report)
+
+    # The loaded data is already cached as Parquet by load_analysis_data, so it is only memoized in memory
+    pipeline.add_stage('data', lambda: load_data(path, lean), persist=False)
+    for name, (func, depends, _) in STAGES.items():
+        pipeline.add_stage(name, func, depends)
+
+    # Years covered, for the plot titles (memoized, so a plot of a memoized 2.2 doesn't reload the data)
+    pipeline.add_stage('period', data_period, ('data',))
+    return pipeline
+
+def run(stages=None, path: str = DATA_FILE, cache_dir: str = STAGE_CACHE_DIR, lean: bool = False) -> dict:
+    """
+    Computes the requested Task 2 stages, reusing memoized results of unchanged stages.
+
+    Args:
+        stages (iterable of str): Stages to compute, e.g. ['2.6']; None for every task.
+        path (str): Path to the analysis workbook.
+        cache_dir (str): Directory of the memoized stage results, None to memoize in memory only.
+        lean (bool): Whether to run on the memory-lean (float32) data.
+
+    Returns:
+        dict: A mapping of stage name to result.
+    """
+    return build_pipeline(path, cache_dir, lean).run(list(stages) if stages is not None else list(STAGES))
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task 2: data analysis")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES), help="Stages to run")
+    parser.add_argument('--data', default=DATA_FILE, help="Path to the analysis workbook")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage instead of using memoized results")
+    parser.add_argument('--no-plot', action='store_true', help="Don't show the Task 2.2 plot")
+    parser.add_argument('--report', metavar='DIR', help="Render the plots to files in DIR instead of showing them")
+    parser.add_argument('--report-formats', nargs='+', default=list(REPORT_FORMATS), help="File formats of the rendered plots")
+    parser.add_argument('--lean', action='store_true', help="Downcast the forecasts and prices to float32 to save memory")
+    parser.add_argument('--memory-report', action='store_true', help="Print the memory footprint of every stage")
+    args = parser.parse_args()
+
+    memory_report = MemoryReport() if args.memory_report else None
+    pipeline = build_pipeline(args.data, None if args.no_cache else STAGE_CACHE_DIR, args.lean, memory_report)
+    results = pipeline.run(args.stages)
+    plot = '2.2' in results and not args.no_plot
+
+    # In report mode the plot is rendered in the background while the results are printed
+    renderer = ReportRenderer(args.report, args.report_formats) if args.report and plot else None
+    if renderer:
+        render_hourly_profile(renderer, results['2.2'], pipeline.result('period'))
+
+    for name, result in results.items():
+        STAGES[name][2](result)
+
+    if memory_report:
+        print("\nMemory footprint per stage:")
+        print(memory_report.render())
+
+    # ### Task 2.2 - Graphing the Results
+    if renderer:
+        print("\nReport files:", ', '.join(renderer.close()))
+    elif plot:
+        plot_hourly_profile(results['2.2'], pipeline.result('period'))
+        plt.show()
@@ -0,0 +1,238 @@
+import hashlib
+import os
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# ## Shared loading of the Task 2 analysis data
+
+# Workbook with the quarter-hourly forecasts and prices, and the format of its 'time' column
+DATA_FILE = 'analysis_task_data.xlsx'
+TIME_FORMAT = '%d/%m/%y %H:%M'
+
+# Directory of the typed columnar copies of the workbook
+CACHE_DIR = '.analysis_cache'
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Computes the SHA-256 hash of a file, reading it in chunks.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _parquet_available() -> bool:
+    # Parquet needs pyarrow (or fastparquet); without it the cache falls back to pickle
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def read_workbook(path: str = DATA_FILE) -> pd.DataFrame:
+    """
+    Reads the analysis workbook and parses its 'time' column.
+
+    Args:
+        path (str): Path to the workbook.
+
+    Returns:
+        pd.DataFrame: The raw data with 'time' as datetime64.
+    """
+    df = pd.read_excel(path)
+    df['time'] = pd.to_datetime(df['time'], format=TIME_FORMAT)
+    return df
+
+def load_analysis_data(path: str = DATA_FILE, cache_dir: str = CACHE_DIR, lean: bool = False) -> pd.DataFrame:
+    """
+    Loads the analysis workbook, converting it once into a typed columnar cache.
+
+    The first call reads the workbook, parses 'time' and writes the result to Parquet (or pickle if
+    pyarrow is not installed) under a name keyed on the workbook's SHA-256 hash. Later calls load that
+    file directly, so the Excel parsing is only repeated when the workbook's contents change.
+
+    Args:
+        path (str): Path to the workbook.
+        cache_dir (str): Directory of the cache.
+        lean (bool): Whether to shrink the loaded data with lean_dtypes (the cache keeps full precision).
+
+    Returns:
+        pd.DataFrame: The analysis data with 'time' as datetime64.
+    """
+    use_parquet = _parquet_available()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}-{file_hash(path)}.{'parquet' if use_parquet else 'pkl'}")
+
+    if os.path.exists(cache_path):
+        df = pd.read_parquet(cache_path) if use_parquet else pd.read_pickle(cache_path)
+        return lean_dtypes(df) if lean else df
+
+    df = read_workbook(path)
+
+    # Write to a temporary name and rename, so an interrupted write never leaves a corrupt cache behind
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    if use_parquet:
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+
+    return lean_dtypes(df) if lean else df
+
+# ## Memory-lean mode
+
+# Largest rounding error accepted when downcasting to float32 (the data has at most 2 decimals)
+FLOAT32_TOLERANCE = 0.005
+
+def lean_dtypes(df: pd.DataFrame, atol: float = FLOAT32_TOLERANCE, max_categories: float = 0.5) -> pd.DataFrame:
+    """
+    Shrinks a DataFrame's columns to the smallest dtypes that keep their values, in place.
+
+    Float columns become float32 where every value survives the round trip within atol, and text
+    columns become booleans (if they only hold 'True'/'False') or categories (if at most
+    max_categories of their values are distinct).
+
+    Args:
+        df (pd.DataFrame): The data (modified in place).
+        atol (float): Largest absolute rounding error accepted for float32.
+        max_categories (float): Largest ratio of distinct values to rows for a categorical column.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, with the smaller dtypes.
+    """
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            downcast = values.to_numpy(dtype=np.float64).astype(np.float32)
+            if np.nanmax(np.abs(downcast - values.to_numpy(dtype=np.float64)), initial=0) <= atol:
+                df[column] = downcast
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            distinct = values.dropna().unique()
+            if set(distinct) <= {'True', 'False'} and not values.isna().any():
+                df[column] = (values == 'True').to_numpy()
+            elif len(distinct) <= max_categories * len(values):
+                df[column] = values.astype('category')
+    return df
+
+def memory_footprint(obj) -> int:
+    """
+    Returns the number of bytes held by a stage result: a DataFrame, Series, array, or a dict/list of them.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(memory_footprint(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(memory_footprint(value) for value in obj)
+    return 0
+
+class MemoryReport:
+    """
+    Collects the memory footprint of each stage of an analysis.
+
+    Methods:
+        record(stage, obj): Records the footprint of a stage's result.
+        render(): Returns the footprints as a text table.
+    """
+    def __init__(self):
+        self.footprints = {}
+
+    def record(self, stage: str, obj) -> None:
+        """
+        Records the footprint of a stage's result (replacing any earlier one of the same stage).
+        """
+        self.footprints[stage] = memory_footprint(obj)
+
+    def render(self, total: bool = True) -> str:
+        """
+        Returns the footprints, one line per stage in MB, and optionally their total (which is only
+        meaningful if the stage results don't share memory).
+        """
+        width = max([len(stage) for stage in self.footprints] + [len('Total')])
+        lines = [f"{stage:<{width}}  {size / 1e6:10.2f} MB" for stage, size in self.footprints.items()]
+        if total:
+            lines.append(f"{'Total':<{width}}  {sum(self.footprints.values()) / 1e6:10.2f} MB")
+        return '\n'.join(lines)
+
+# ## Calendar features
+
+def _easter_sunday(year: int) -> date:
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher)
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def german_holidays(years) -> list:
+    """
+    Returns the German nationwide public holidays of the given years.
+
+    Args:
+        years (iterable of int): The years.
+
+    Returns:
+        list: The holiday dates.
+    """
+    holidays = []
+    for year in years:
+        easter = _easter_sunday(year)
+        holidays += [
+            date(year, 1, 1),                 # New Year's Day
+            easter - timedelta(days=2),       # Good Friday
+            easter + timedelta(days=1),       # Easter Monday
+            date(year, 5, 1),                 # Labour Day
+            easter + timedelta(days=39),      # Ascension Day
+            easter + timedelta(days=50),      # Whit Monday
+            date(year, 10, 3),                # German Unity Day
+            date(year, 12, 25),               # Christmas Day
+            date(year, 12, 26),               # Boxing Day
+        ]
+    return holidays
+
+def add_calendar_features(df: pd.DataFrame, holidays=None) -> pd.DataFrame:
+    """
+    Adds calendar features derived from the 'time' column, computed once and vectorized.
+
+    Adds the columns 'date' (datetime64 at midnight), 'hour' (int8, 0-23), 'quarter_hour' (int8, index of the
+    quarter-hour within the day, 0-95), 'dayofweek' (int8, Monday=0), 'is_weekend' (bool) and 'is_holiday' (bool).
+
+    Args:
+        df (pd.DataFrame): Data with a datetime 'time' column (modified in place).
+        holidays (iterable of dates): Public holidays; defaults to the German nationwide holidays of the years in the data.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, with the calendar columns added.
+    """
+    time = df['time'].dt
+    df['date'] = time.normalize()
+    df['hour'] = time.hour.astype(np.int8)
+    df['quarter_hour'] = (time.hour * 4 + time.minute // 15).astype(np.int8)
+    df['dayofweek'] = time.dayofweek.astype(np.int8)
+    df['is_weekend'] = (df['dayofweek'] >= 5).to_numpy()
+
+    if holidays is None:
+        holidays = german_holidays(range(time.year.min(), time.year.max() + 1))
+    df['is_holiday'] = df['date'].isin(pd.to_datetime(list(holidays))).to_numpy()
+
+    return df
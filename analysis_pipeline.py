@@ -0,0 +1,193 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+from collections import namedtuple
+from analysis_data import MemoryReport
+
+# ## Lazy, memoized analysis pipeline
+
+# Directory where stage results are memoized
+STAGE_CACHE_DIR = os.path.join('.analysis_cache', 'stages')
+
+# A named computation, the stages whose results it takes as arguments, and whether to memoize it on disk
+Stage = namedtuple('Stage', ['name', 'func', 'depends', 'persist'])
+
+def _source_of(func) -> str:
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{func.__module__}.{func.__qualname__}"
+
+def _file_of(obj) -> str:
+    try:
+        return os.path.abspath(inspect.getfile(obj))
+    except TypeError:
+        return None  # Built-in
+
+def _code_names(code) -> set:
+    # Global names used by a code object and the functions, lambdas and comprehensions nested in it
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+def _module_file_parts(module_file: str, project_dir: str, seen: set) -> list:
+    # The source of a project module and, transitively, of the project modules it uses
+    if module_file in seen:
+        return []
+    seen.add(module_file)
+    with open(module_file, 'rb') as f:
+        parts = [hashlib.sha256(f.read()).hexdigest()]
+    module = next((m for m in list(sys.modules.values()) if getattr(m, '__file__', None)
+                   and os.path.abspath(m.__file__) == module_file), None)
+    for obj in vars(module).values() if module is not None else ():
+        obj_file = _file_of(obj) if inspect.ismodule(obj) or inspect.isclass(obj) or inspect.isfunction(obj) else None
+        if obj_file is not None and os.path.dirname(obj_file) == project_dir:
+            parts += _module_file_parts(obj_file, project_dir, seen)
+    return parts
+
+def _code_fingerprint(func) -> str:
+    """
+    Fingerprints the code a stage runs, so editing it invalidates the stage's memoized result.
+
+    Covers the stage function's source, the functions and simple constants of its own module that it
+    uses (followed recursively), and the full source of every other project module it reaches (the
+    modules next to the stage's module, e.g. the helpers that do the real work), transitively.
+    """
+    own_file = _file_of(func)
+    project_dir = os.path.dirname(own_file) if own_file else None
+    parts, seen_funcs, seen_files = [], set(), set()
+
+    def walk(function):
+        seen_funcs.add(function)
+        parts.append(_source_of(function))
+        for name in sorted(_code_names(function.__code__)):
+            obj = function.__globals__.get(name)
+            if isinstance(obj, (str, int, float, bool, tuple, list, dict, frozenset)):
+                parts.append(f"{name}={obj!r}")
+                continue
+            if not (inspect.ismodule(obj) or inspect.isclass(obj) or inspect.isfunction(obj)):
+                continue
+            obj_file = _file_of(obj)
+            if obj_file is None or os.path.dirname(obj_file) != project_dir:
+                continue  # Standard library and third-party code
+            if obj_file == own_file and inspect.isfunction(obj):
+                if obj not in seen_funcs:
+                    walk(obj)
+            elif obj_file == own_file:
+                parts.append(_source_of(obj))
+            else:
+                parts.extend(_module_file_parts(obj_file, project_dir, seen_files))
+
+    if project_dir is None or not inspect.isfunction(func):
+        return _source_of(func)
+    walk(func)
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+class Pipeline:
+    """
+    A set of named stages with declared dependencies, evaluated lazily and memoized to disk.
+
+    Only the stages needed for the requested results are computed. Each stage's result is keyed on the
+    input key (e.g. the hash of the input file), the stage's code (including the project modules it
+    calls into) and the keys of its dependencies, so a rerun loads unchanged stages from disk and
+    recomputes only the stages downstream of a change.
+
+    Args:
+        input_key (str): Identifies the pipeline's input, e.g. the SHA-256 hash of the input file.
+        cache_dir (str): Directory of the memoized results, None to memoize in memory only.
+        memory_report (MemoryReport): Collects the memory footprint of every stage result, if given.
+
+    Methods:
+        add_stage(name, func, depends, persist): Registers a stage.
+        result(name): Returns the result of a stage, computing it and its dependencies if needed.
+        run(names): Returns the results of several stages.
+    """
+    def __init__(self, input_key: str, cache_dir: str = STAGE_CACHE_DIR, memory_report: MemoryReport = None):
+        self.input_key = input_key
+        self.cache_dir = cache_dir
+        self.memory_report = memory_report
+        self.stages = {}
+        self._keys = {}
+        self._results = {}
+
+    def add_stage(self, name: str, func, depends=(), persist: bool = True) -> None:
+        """
+        Registers a stage.
+
+        Args:
+            name (str): Name of the stage.
+            func (callable): Computes the stage from the results of its dependencies, passed positionally.
+            depends (tuple of str): Names of the stages whose results func takes, in argument order.
+            persist (bool): Whether to memoize the result on disk (in memory otherwise).
+        """
+        self.stages[name] = Stage(name, func, tuple(depends), persist)
+
+    def key(self, name: str) -> str:
+        """
+        Returns the memoization key of a stage.
+        """
+        if name not in self._keys:
+            stage = self._stage(name)
+            digest = hashlib.sha256()
+            for part in [self.input_key, name, _code_fingerprint(stage.func)] + [self.key(dep) for dep in stage.depends]:
+                digest.update(part.encode())
+                digest.update(b'\0')
+            self._keys[name] = digest.hexdigest()[:16]
+        return self._keys[name]
+
+    def _stage(self, name: str) -> Stage:
+        try:
+            return self.stages[name]
+        except KeyError:
+            raise ValueError(f"Unknown stage '{name}', expected one of {list(self.stages)}")
+
+    def _cache_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)}.pkl")
+
+    def result(self, name: str):
+        """
+        Returns the result of a stage, loading it from disk or computing it (and its dependencies) if needed.
+
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            The stage's result.
+        """
+        if name in self._results:
+            return self._results[name]
+
+        stage = self._stage(name)
+        use_disk = stage.persist and self.cache_dir is not None
+        if use_disk and os.path.exists(self._cache_path(name)):
+            with open(self._cache_path(name), 'rb') as f:
+                result = pickle.load(f)
+        else:
+            result = stage.func(*(self.result(dep) for dep in stage.depends))
+            if use_disk:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{self._cache_path(name)}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._cache_path(name))
+
+        self._results[name] = result
+        if self.memory_report is not None:
+            self.memory_report.record(name, result)
+        return result
+
+    def run(self, names=None) -> dict:
+        """
+        Returns the results of several stages.
+
+        Args:
+            names (iterable of str): Names of the stages, None for every stage.
+
+        Returns:
+            dict: A mapping of stage name to result, in the requested order.
+        """
+        return {name: self.result(name) for name in (names if names is not None else self.stages)}
@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+# ## Battery arbitrage optimisation (Task 2.6)
+
+DA_PRICE_COLUMN = 'Day Ahead Price hourly [in EUR/MWh]'
+
+def daily_price_matrix(df_hourly: pd.DataFrame, price_column: str = DA_PRICE_COLUMN) -> pd.DataFrame:
+    """
+    Reshapes hourly prices into a days x 24 matrix.
+
+    Args:
+        df_hourly (pd.DataFrame): Hourly data with 'date', 'hour' and price columns (e.g. from hourly_energy).
+        price_column (str): Column holding the price.
+
+    Returns:
+        pd.DataFrame: One row per date (in order of appearance) and one column per hour 0-23; hours
+        missing on a date (e.g. on the DST spring-forward day) are NaN.
+    """
+    dates = df_hourly['date'].unique()
+    matrix = df_hourly.pivot(index='date', columns='hour', values=price_column)
+    return matrix.reindex(index=dates, columns=range(24))
+
+def best_daily_arbitrage(df_hourly: pd.DataFrame, price_column: str = DA_PRICE_COLUMN, top_n: int = 12) -> pd.DataFrame:
+    """
+    Finds, for every day, the single charge-then-discharge pair of hours that maximises revenue.
+
+    The discharge hour is chosen among the day's top_n highest positive prices, and the charge hour is
+    the cheapest earlier hour (negative prices allowed, the earliest hour on ties). All days are solved
+    at once on a days x 24 price matrix: the cheapest earlier hour comes from a running minimum along
+    the hours, so the work is linear in the number of days.
+
+    Args:
+        df_hourly (pd.DataFrame): Hourly data with 'date', 'hour' and price columns (e.g. from hourly_energy).
+        price_column (str): Column holding the price.
+        top_n (int): Number of highest positive prices considered as discharge hours.
+
+    Returns:
+        pd.DataFrame: One row per date with 'date', 'buy price', 'charge hour', 'sell price',
+        'discharge hour' and 'revenue' (in EUR per MWh moved). Days without a valid pair (no positive
+        price with an earlier hour) have all values 0.
+    """
+    matrix = daily_price_matrix(df_hourly, price_column)
+    prices = matrix.to_numpy(dtype=float)
+    num_days, num_hours = prices.shape
+    hours = np.arange(num_hours)
+
+    # Running minimum over hours 0..h, and the earliest hour where it is reached (missing hours never win)
+    filled = np.where(np.isnan(prices), np.inf, prices)
+    running_min = np.minimum.accumulate(filled, axis=1)
+    previous_running_min = np.concatenate([np.full((num_days, 1), np.inf), running_min[:, :-1]], axis=1)
+    new_minimum = filled < previous_running_min
+    running_argmin = np.maximum.accumulate(np.where(new_minimum, hours, 0), axis=1)
+
+    # Cheapest strictly earlier hour for every hour (none for hour 0)
+    earlier_min = previous_running_min
+    earlier_argmin = np.concatenate([np.zeros((num_days, 1), dtype=int), running_argmin[:, :-1]], axis=1)
+
+    # Discharge candidates: the top_n highest positive prices of each day (ties keep the earlier hour first)
+    positive = np.where(prices > 0, prices, -np.inf)
+    order = np.argsort(-positive, axis=1, kind='stable')
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, hours[np.newaxis, :].repeat(num_days, axis=0), axis=1)
+    candidate = (prices > 0) & (rank < top_n) & np.isfinite(earlier_min)
+
+    # Best candidate per day; scanning in price order keeps the higher sell price on equal revenue
+    revenue = np.where(candidate, prices - earlier_min, -np.inf)
+    revenue_in_price_order = np.take_along_axis(revenue, order, axis=1)
+    best_hour = np.take_along_axis(order, revenue_in_price_order.argmax(axis=1)[:, np.newaxis], axis=1)[:, 0]
+
+    day_index = np.arange(num_days)
+    has_pair = candidate.any(axis=1)
+    return pd.DataFrame({
+        'date': matrix.index,
+        'buy price': np.where(has_pair, earlier_min[day_index, best_hour], 0.0),
+        'charge hour': np.where(has_pair, earlier_argmin[day_index, best_hour], 0),
+        'sell price': np.where(has_pair, prices[day_index, best_hour], 0.0),
+        'discharge hour': np.where(has_pair, best_hour, 0),
+        'revenue': np.where(has_pair, revenue[day_index, best_hour], 0.0),
+    })
+
+def optimise_battery(times: pd.Series, prices: pd.Series, capacity_mwh: float = 1.0, power_mw: float = 1.0,
+                     efficiency: float = 1.0, max_cycles_per_day: float = None,
+                     interval_hours: float = 0.25) -> pd.DataFrame:
+    """
+    Finds the revenue-maximising charge/discharge schedule of a battery with dynamic programming.
+
+    In every interval the battery charges at full power, discharges at full power or stays idle. The
+    state of charge is tracked in steps of the energy stored by one full-power charging interval, and
+    the round-trip efficiency is split evenly between charging and discharging. Optionally the energy
+    discharged per calendar day is limited to max_cycles_per_day times the capacity. The battery starts
+    empty, and energy left at the end has no value.
+
+    Args:
+        times (pd.Series): Start time of every interval, in order.
+        prices (pd.Series): Price of every interval (EUR/MWh).
+        capacity_mwh (float): Usable storage capacity (MWh).
+        power_mw (float): Maximum charge/discharge power (MW).
+        efficiency (float): Round-trip efficiency (0-1].
+        max_cycles_per_day (float): Maximum full cycles per day, None for no limit.
+        interval_hours (float): Length of one interval in hours (0.25 for quarter-hours).
+
+    Returns:
+        pd.DataFrame: One row per interval with 'time', 'price', 'action' (+1 charge, -1 discharge,
+        0 idle), 'state of charge [MWh]' (after the interval) and 'cashflow [EUR]'.
+    """
+    prices = np.asarray(prices, dtype=float)
+    times = pd.Series(times).reset_index(drop=True)
+    num_intervals = len(prices)
+
+    # Energy bought per charging interval, and energy stored / sold per state-of-charge step
+    charge_efficiency = discharge_efficiency = np.sqrt(efficiency)
+    bought_mwh = power_mw * interval_hours
+    step_mwh = bought_mwh * charge_efficiency
+    sold_mwh = step_mwh * discharge_efficiency
+    num_levels = int(np.floor(capacity_mwh / step_mwh + 1e-9)) + 1  # States 0..num_levels-1
+
+    # Discharge steps allowed per day (a single counter state if there is no limit)
+    if max_cycles_per_day is None:
+        max_daily_steps = None
+        num_counts = 1
+    else:
+        max_daily_steps = int(np.floor(max_cycles_per_day * (num_levels - 1) + 1e-9))
+        num_counts = max_daily_steps + 1
+
+    days = times.dt.normalize().to_numpy()
+    new_day_next = np.append(days[1:] != days[:-1], True)
+
+    # Backward induction over (state of charge, steps discharged today)
+    value = np.zeros((num_levels, num_counts))
+    policy = np.zeros((num_intervals, num_levels, num_counts), dtype=np.int8)
+    for t in range(num_intervals - 1, -1, -1):
+        # The discharge counter restarts with the next day
+        future = np.repeat(value[:, :1], num_counts, axis=1) if new_day_next[t] else value
+
+        idle = future
+        charge = np.full_like(future, -np.inf)
+        charge[:-1, :] = future[1:, :] - prices[t] * bought_mwh
+        discharge = np.full_like(future, -np.inf)
+        if max_daily_steps is None:
+            discharge[1:, :] = future[:-1, :] + prices[t] * sold_mwh
+        else:
+            discharge[1:, :-1] = future[:-1, 1:] + prices[t] * sold_mwh
+
+        options = np.stack([idle, charge, discharge])
+        best = options.argmax(axis=0)
+        policy[t] = best
+        value = np.take_along_axis(options, best[np.newaxis], axis=0)[0]
+
+    # Follow the optimal policy forward from an empty battery
+    actions = np.zeros(num_intervals, dtype=np.int8)
+    soc = np.zeros(num_intervals, dtype=int)
+    level, count = 0, 0
+    for t in range(num_intervals):
+        choice = policy[t, level, count]
+        if choice == 1:
+            level += 1
+            actions[t] = 1
+        elif choice == 2:
+            level -= 1
+            if max_daily_steps is not None:
+                count += 1
+            actions[t] = -1
+        soc[t] = level
+        if new_day_next[t]:
+            count = 0
+
+    cashflow = np.where(actions == 1, -prices * bought_mwh, np.where(actions == -1, prices * sold_mwh, 0.0))
+    return pd.DataFrame({
+        'time': times,
+        'price': prices,
+        'action': actions,
+        'state of charge [MWh]': soc * step_mwh,
+        'cashflow [EUR]': cashflow,
+    })
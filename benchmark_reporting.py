@@ -0,0 +1,230 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+import numpy as np
+import pandas as pd
+from Task_1 import Volume_Calculator, compute_pnl_all, SQL_Volume_Calculator, compute_pnl_all_sql, ensure_trade_indexes, stream_aggregates
+from columnar_cache import load_or_export
+from trade_store import TRADES_TABLE
+
+# ## Benchmarks for the reporting tool (Task 1)
+
+# Backends that can be benchmarked, plus the end-to-end HTTP benchmark of the /pnl endpoint
+BACKENDS = ['pandas', 'sql', 'streaming', 'columnar', 'http']
+
+# ### Synthetic EPEX trade generator
+
+def generate_trades(db_path: str, rows: int, num_strategies: int = 12, buy_ratio: float = 0.5,
+                    table: str = TRADES_TABLE, seed: int = 0, batch_size: int = 100_000) -> None:
+    """
+    Fills a SQLite database with a deterministic synthetic trades table shaped like epex_12_20_12_13.
+
+    The table is generated into a temporary file that replaces db_path only once it is complete, so an
+    interrupted generation never leaves a truncated database at db_path.
+
+    Args:
+        db_path (str): Path of the database file to create (an existing file is replaced).
+        rows (int): Number of trades to generate.
+        num_strategies (int): Number of distinct strategies ('strategy_1' ... 'strategy_<n>').
+        buy_ratio (float): Share of 'buy' trades (the rest are 'sell').
+        table (str): Name of the trades table.
+        seed (int): Seed of the random generator, so the same arguments always give the same table.
+        batch_size (int): Number of trades generated and inserted per transaction.
+    """
+    # Leftover of an earlier interrupted generation
+    tmp_path = f"{db_path}.tmp"
+    for path in (tmp_path, f"{tmp_path}-journal"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    rng = np.random.default_rng(seed)
+    strategy_names = np.array([f"strategy_{i + 1}" for i in range(num_strategies)], dtype=object)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(f"""CREATE TABLE {table} (
+            id TEXT PRIMARY KEY,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            side TEXT NOT NULL CHECK (side IN ('buy', 'sell')),
+            strategy TEXT NOT NULL
+        )""")
+
+        for start in range(0, rows, batch_size):
+            n = min(batch_size, rows - start)
+            ids = (f"trade_{i}" for i in range(start + 1, start + n + 1))
+            quantity = rng.integers(1, 50, size=n)
+            price = np.round(rng.normal(100.0, 40.0, size=n), 2)
+            side = np.where(rng.random(n) < buy_ratio, 'buy', 'sell')
+            strategy = strategy_names[rng.integers(0, num_strategies, size=n)]
+            conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?)",
+                             zip(ids, quantity.tolist(), price.tolist(), side.tolist(), strategy.tolist()))
+            conn.commit()
+    finally:
+        conn.close()
+
+    # Only a complete database is moved into place
+    os.replace(tmp_path, db_path)
+
+# ### Backend benchmarks
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+def _percentile_ms(latencies: list, q: float) -> float:
+    return float(np.percentile(latencies, q) * 1000)
+
+def _benchmark_backend(backend: str, db_path: str, table: str, num_requests: int) -> dict:
+    # Runs in a fresh worker process, so the peak RSS belongs to this backend alone
+    result = {'backend': backend}
+
+    if backend == 'http':
+        # Serve the real Flask app on a free local port and time full HTTP round trips
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # Don't log every timed request
+        spec = importlib.util.spec_from_file_location('pnl_service', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Task_1.3.py'))
+        service = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(service)
+        service.trade_store.db_path = db_path
+        service.trade_store.table = table
+
+        server = make_server('127.0.0.1', 0, service.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/pnl/strategy_1"
+        try:
+            start = time.perf_counter()
+            urllib.request.urlopen(url).read()  # The first request loads the table into the store
+            result['load_s'] = time.perf_counter() - start
+
+            latencies = []
+            for _ in range(num_requests):
+                start = time.perf_counter()
+                urllib.request.urlopen(url).read()
+                latencies.append(time.perf_counter() - start)
+            result['http_p50_ms'] = _percentile_ms(latencies, 50)
+            result['http_p99_ms'] = _percentile_ms(latencies, 99)
+        finally:
+            server.shutdown()
+
+    else:
+        start = time.perf_counter()
+        if backend == 'pandas':
+            with sqlite3.connect(db_path) as conn:
+                trades_df = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+        elif backend == 'sql':
+            # Index creation is a one-off cost, so it counts as loading
+            with sqlite3.connect(db_path) as conn:
+                ensure_trade_indexes(conn, table)
+        elif backend == 'columnar':
+            trades_df = load_or_export(db_path, table, cache_dir=f"{db_path}.columnar")
+        result['load_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if backend in ('pandas', 'columnar'):
+            total_volume = Volume_Calculator(trades_df)
+            volumes = (total_volume.Buy_Volume(), total_volume.Sell_Volume())
+            pnl_by_strategy = compute_pnl_all(trades_df)
+        elif backend == 'sql':
+            with sqlite3.connect(db_path) as conn:
+                sql_volume = SQL_Volume_Calculator(conn, table)
+                volumes = (sql_volume.Buy_Volume(), sql_volume.Sell_Volume())
+                pnl_by_strategy = compute_pnl_all_sql(conn, table)
+        elif backend == 'streaming':
+            with sqlite3.connect(db_path) as conn:
+                streamed = stream_aggregates(conn, table)
+            volumes = (streamed.Buy_Volume(), streamed.Sell_Volume())
+            pnl_by_strategy = streamed.pnl_by_strategy
+        else:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        result['aggregate_s'] = time.perf_counter() - start
+
+        # Checksums, so results of different backends can be compared for correctness
+        result['buy_volume'] = int(volumes[0])
+        result['sell_volume'] = int(volumes[1])
+        result['total_pnl'] = float(sum(pnl_by_strategy.values()))
+
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(row_counts, backends=BACKENDS, num_strategies: int = 12, buy_ratio: float = 0.5,
+                   num_requests: int = 200, data_dir: str = 'bench_data', seed: int = 0) -> dict:
+    """
+    Generates a synthetic trades database per row count and benchmarks every backend on it.
+
+    Each backend runs in its own freshly spawned process, so its peak RSS is measured in isolation.
+    Databases are reused between runs when they already exist with the same generator arguments.
+
+    Args:
+        row_counts (iterable of int): Table sizes to benchmark, e.g. [10_000, 1_000_000, 10_000_000].
+        backends (iterable of str): Backends to benchmark (see BACKENDS).
+        num_strategies (int): Number of distinct strategies in the generated tables.
+        buy_ratio (float): Share of 'buy' trades in the generated tables.
+        num_requests (int): Number of timed HTTP requests for the 'http' backend.
+        data_dir (str): Directory for the generated databases.
+        seed (int): Seed of the trade generator.
+
+    Returns:
+        dict: Machine-readable results with the run metadata and one entry per (row count, backend).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+
+    for rows in row_counts:
+        db_path = os.path.join(data_dir, f"trades_{rows}_{num_strategies}_{buy_ratio}_{seed}.sqlite")
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            generate_trades(db_path, rows, num_strategies, buy_ratio, seed=seed)
+            print(f"Generated {rows} trades in {time.perf_counter() - start:.1f}s")
+
+        for backend in backends:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                result = pool.submit(_benchmark_backend, backend, db_path, TRADES_TABLE, num_requests).result()
+            result.update(rows=rows, strategies=num_strategies, buy_ratio=buy_ratio)
+            results.append(result)
+            print(result)
+
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'results': results,
+    }
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the volume/PnL backends and the /pnl endpoint")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000], help="Table sizes to benchmark")
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS, help="Backends to benchmark")
+    parser.add_argument('--strategies', type=int, default=12, help="Number of strategies in the generated tables")
+    parser.add_argument('--buy-ratio', type=float, default=0.5, help="Share of buy trades in the generated tables")
+    parser.add_argument('--requests', type=int, default=200, help="Number of timed HTTP requests")
+    parser.add_argument('--data-dir', default='bench_data', help="Directory for the generated databases")
+    parser.add_argument('--output', default='benchmark_results.json', help="File to write the results to")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.rows, args.backends, args.strategies, args.buy_ratio, args.requests, args.data_dir)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from Task_1 import Volume_Calculator, compute_pnl_all
+from trade_store import DATABASE_PATH, TRADES_TABLE, database_signature
+
+# ## Memory-mapped columnar trade cache
+
+# Default directory of the columnar cache
+CACHE_DIR = 'trades_cache'
+
+# Fixed category order of the 'side' column
+SIDE_CATEGORIES = ['buy', 'sell']
+
+def _smallest_code_dtype(num_categories: int) -> np.dtype:
+    # Smallest signed integer type that holds every category code (pandas categorical codes are signed)
+    for dtype in (np.int8, np.int16, np.int32):
+        if num_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def _source_signature(db_path: str) -> list:
+    # Modification time and size of the database file and its write-ahead log, used to tell whether the cache is stale
+    return database_signature(db_path)
+
+def export_columnar(db_path: str = DATABASE_PATH, table: str = TRADES_TABLE, cache_dir: str = CACHE_DIR) -> None:
+    """
+    Writes a trades table to a compact columnar cache of raw `.npy` files.
+
+    Columns are stored as: 'side' and 'strategy' as categorical codes (int8 where possible), 'quantity' as
+    int32 and 'price' as float64. The categories and the source database signature go to `meta.json`.
+
+    Every export writes a new generation directory and then replaces `meta.json`, which names the
+    current generation, atomically. Files that readers have memory-mapped are never overwritten: the
+    previous generation is kept for readers that have just read the old `meta.json`, and older ones are
+    deleted (a mapping stays valid after its file is unlinked).
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        table (str): Name of the trades table.
+        cache_dir (str): Directory to write the cache to.
+
+    Raises:
+        ValueError: If a quantity does not fit in int32 or a side is not 'buy'/'sell'.
+    """
+    # The signature is taken before the read: a write committed in between makes the cache look stale
+    # on the next check and triggers one extra export, whereas taking it after could mark old data as current
+    source = _source_signature(db_path)
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        trades_df = pd.read_sql_query(f"SELECT side, strategy, quantity, price FROM {table}", conn)
+
+    # Categorical codes for the string columns
+    side_codes = pd.Categorical(trades_df['side'], categories=SIDE_CATEGORIES).codes
+    if (side_codes < 0).any():
+        raise ValueError(f"Table {table} has sides other than {SIDE_CATEGORIES}")
+    strategy_codes, strategy_categories = pd.factorize(trades_df['strategy'], sort=True)
+
+    # int32 quantity, checked so that no value silently overflows
+    quantity = trades_df['quantity'].to_numpy()
+    if len(quantity) and (quantity.min() < np.iinfo(np.int32).min or quantity.max() > np.iinfo(np.int32).max):
+        raise ValueError(f"Table {table} has quantities that do not fit in int32")
+
+    # Write the columns to a new generation directory, leaving the current one untouched
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    previous = _current_generation(cache_dir)
+    generation_dir = tempfile.mkdtemp(prefix='gen-', dir=cache_dir)
+    np.save(os.path.join(generation_dir, 'side.npy'), side_codes.astype(np.int8))
+    np.save(os.path.join(generation_dir, 'strategy.npy'), strategy_codes.astype(_smallest_code_dtype(len(strategy_categories))))
+    np.save(os.path.join(generation_dir, 'quantity.npy'), quantity.astype(np.int32))
+    np.save(os.path.join(generation_dir, 'price.npy'), trades_df['price'].to_numpy(dtype=np.float64))
+
+    # Metadata is written last and switches readers to the new generation in one step
+    meta = {
+        'table': table,
+        'rows': len(trades_df),
+        'side_categories': SIDE_CATEGORIES,
+        'strategy_categories': [str(strategy_id) for strategy_id in strategy_categories],
+        'source': source,
+        'generation': os.path.basename(generation_dir),
+    }
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+    # Delete the generations before the previous one, and the files of the old single-directory layout
+    keep = {meta['generation'], previous}
+    for entry in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entry)
+        if entry.startswith('gen-') and entry not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+        elif entry.endswith('.npy'):
+            os.remove(path)
+
+def _current_generation(cache_dir: str):
+    # Generation directory named by the cache's meta.json, None if there is none
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f).get('generation')
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def load_columnar(cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """
+    Memory-maps a columnar trade cache as a DataFrame without copying the column data.
+
+    The arrays are mapped read-only, so loading is near-instant regardless of the table size and
+    worker processes mapping the same cache share its pages. The DataFrame has categorical 'side' and
+    'strategy' columns and can be passed directly to Volume_Calculator and compute_pnl.
+
+    Args:
+        cache_dir (str): Directory of the cache written by export_columnar.
+
+    Returns:
+        pd.DataFrame: The trades with 'side', 'strategy', 'quantity' and 'price' columns.
+    """
+    with open(os.path.join(cache_dir, 'meta.json')) as f:
+        meta = json.load(f)
+
+    generation_dir = os.path.join(cache_dir, meta['generation'])
+    columns = {name: np.load(os.path.join(generation_dir, f'{name}.npy'), mmap_mode='r')
+               for name in ('side', 'strategy', 'quantity', 'price')}
+
+    # The codes were range-checked when the cache was written; validating them again would copy them
+    return pd.DataFrame({
+        'side': pd.Categorical.from_codes(columns['side'], categories=meta['side_categories'], validate=False),
+        'strategy': pd.Categorical.from_codes(columns['strategy'], categories=meta['strategy_categories'], validate=False),
+        'quantity': pd.Series(columns['quantity'], copy=False),
+        'price': pd.Series(columns['price'], copy=False),
+    }, copy=False)
+
+def load_or_export(db_path: str = DATABASE_PATH, table: str = TRADES_TABLE, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """
+    Memory-maps the columnar cache of a trades table, (re)building it first if it is missing or stale.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        table (str): Name of the trades table.
+        cache_dir (str): Directory of the cache.
+
+    Returns:
+        pd.DataFrame: The memory-mapped trades.
+    """
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        is_current = meta['table'] == table and meta['source'] == _source_signature(db_path) and 'generation' in meta
+    except (FileNotFoundError, KeyError, json.JSONDecodeError):
+        is_current = False
+
+    if not is_current:
+        export_columnar(db_path, table, cache_dir)
+    return load_columnar(cache_dir)
+
+# Example usage
+if __name__ == "__main__":
+    try:
+        # Build the cache on the first run, then memory-map it on every later run
+        trades_df = load_or_export()
+
+        total_volume = Volume_Calculator(trades_df)
+        print(f"Total buy volume: {total_volume.Buy_Volume()}")
+        print(f"Total sell volume: {total_volume.Sell_Volume()}")
+
+        for strategy_id, pnl_value in compute_pnl_all(trades_df).items():
+            print(f"The PnL of {strategy_id} is: {pnl_value}")
+
+    except Exception as e:
+        print(f"Error: {e}")
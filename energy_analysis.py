@@ -0,0 +1,60 @@
+import pandas as pd
+
+# ## Reusable Task 2 analysis functions
+
+# Quarter-hourly power forecasts (in MW) and hourly prices (in EUR/MWh) of the analysis data
+POWER_COLUMNS = [
+    'Wind Day Ahead Forecast [in MW]',
+    'Wind Intraday Forecast [in MW]',
+    'PV Day Ahead Forecast [in MW]',
+    'PV Intraday Forecast [in MW]',
+]
+PRICE_COLUMNS = [
+    'Day Ahead Price hourly [in EUR/MWh]',
+    'Intraday Price Hourly  [in EUR/MWh]',
+]
+
+def energy_column_name(power_column: str) -> str:
+    """
+    Returns the name of the energy (MWh) column derived from a power (MW) column.
+    """
+    if '[in MW]' in power_column:
+        return power_column.replace('[in MW]', '[in MWh]')
+    return f"{power_column} [in MWh]"
+
+def hourly_energy(df: pd.DataFrame, power_columns: list = POWER_COLUMNS, price_columns: list = PRICE_COLUMNS) -> pd.DataFrame:
+    """
+    Aggregates quarter-hourly data by date and hour, converting power (MW) to energy (MWh).
+
+    The energy of an hour is the sum of its power values times the length of one interval, i.e.
+    sum / number of intervals in that hour. Counting the intervals per hour keeps the result correct
+    on DST days, where the repeated hour has 8 intervals instead of 4. Prices are averaged per hour.
+    Everything is computed with built-in grouped reductions over all columns at once.
+
+    Args:
+        df (pd.DataFrame): Quarter-hourly data with 'date' and 'hour' columns, or a datetime 'time'
+            column to derive them from.
+        power_columns (list): Power columns (in MW) to convert to energy per hour.
+        price_columns (list): Price columns to average per hour.
+
+    Returns:
+        pd.DataFrame: One row per date and hour, with 'date', 'hour', the energy columns (renamed
+        from '[in MW]' to '[in MWh]') and the mean prices.
+    """
+    if 'date' in df.columns and 'hour' in df.columns:
+        keys = [df['date'], df['hour']]
+    else:
+        keys = [df['time'].dt.normalize().rename('date'), df['time'].dt.hour.rename('hour')]
+
+    grouped = df[power_columns + price_columns].groupby(keys)
+
+    # Sum of every column, number of non-missing values, and number of intervals per hour
+    sums = grouped.sum()
+    counts = grouped.count()
+    intervals = grouped.size()
+
+    # MWh = sum of MW * (1 hour / number of intervals in the hour); prices are plain means
+    energy = sums[power_columns].div(intervals, axis=0).rename(columns=energy_column_name)
+    prices = sums[price_columns] / counts[price_columns]
+
+    return pd.concat([energy, prices], axis=1).reset_index()
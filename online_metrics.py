@@ -0,0 +1,253 @@
+import argparse
+import json
+import math
+import os
+import sys
+from collections import deque
+
+# ## Incremental strategy metrics for streaming quarter-hour P/L
+
+# Default rolling Sharpe window (one week of quarter-hours) and annualisation factor (quarter-hours per year)
+SHARPE_WINDOW = 7 * 96
+PERIODS_PER_YEAR = 365 * 96
+
+class OnlineMetrics:
+    """
+    Accumulates the Task 2.7.7 performance metrics of a P/L stream, one quarter-hour at a time.
+
+    Every update is O(1): the cumulative P/L, running peak, max drawdown and trade counts are single
+    numbers, and the rolling Sharpe ratio keeps the running sum and sum of squares of the last window
+    values (recomputed from the window once per window length, so rounding errors don't build up).
+    The metrics after any number of updates equal signal_evaluation.pnl_metrics of the same series.
+
+    The state is a small JSON-serialisable dict whose size depends on the Sharpe window only, so a
+    live process can save it after every update and restart from it without replaying the history.
+
+    Args:
+        sharpe_window (int): Number of most recent quarter-hours of the rolling Sharpe ratio.
+        periods_per_year (int): Number of quarter-hours per year, to annualise the Sharpe ratio.
+
+    Methods:
+        update(pnl, time): Adds the P/L of one quarter-hour.
+        update_many(values, times): Adds the P/L of several quarter-hours in order.
+        metrics(): Returns the current metrics.
+        state_dict(): Returns the state as a JSON-serialisable dict.
+        from_state(state): Restores an accumulator from a state dict.
+        save(path) / load(path): Writes or reads the state as a JSON file.
+    """
+    def __init__(self, sharpe_window: int = SHARPE_WINDOW, periods_per_year: int = PERIODS_PER_YEAR):
+        if sharpe_window < 2:
+            raise ValueError("The Sharpe window needs at least 2 quarter-hours")
+        self.sharpe_window = sharpe_window
+        self.periods_per_year = periods_per_year
+
+        self.count = 0               # Number of quarter-hours ingested
+        self.total_pnl = 0.0         # Cumulative P/L
+        self.peak = None             # Running peak of the cumulative P/L (None before the first update)
+        self.max_drawdown = 0.0      # Largest fall below the running peak, as a negative number
+        self.profitable_trades = 0
+        self.losing_trades = 0
+        self.last_time = None        # Time of the last quarter-hour, to know where a restarted stream resumes
+
+        # Rolling Sharpe window and its running sums
+        self.window = deque(maxlen=sharpe_window)
+        self.window_sum = 0.0
+        self.window_sum_sq = 0.0
+        self._updates_since_resync = 0
+
+    def update(self, pnl: float, time=None) -> None:
+        """
+        Adds the P/L of one quarter-hour.
+
+        Args:
+            pnl (float): P/L of the quarter-hour (0 without a trade).
+            time (str or datetime): Time of the quarter-hour, kept as last_time (optional).
+        """
+        pnl = float(pnl)
+        if math.isnan(pnl):
+            pnl = 0.0  # No trade, as in strategy_pnl
+
+        self.count += 1
+        self.total_pnl += pnl
+        self.peak = self.total_pnl if self.peak is None else max(self.peak, self.total_pnl)
+        self.max_drawdown = min(self.max_drawdown, self.total_pnl - self.peak)
+        if pnl > 0:
+            self.profitable_trades += 1
+        elif pnl < 0:
+            self.losing_trades += 1
+        if time is not None:
+            self.last_time = time.isoformat() if hasattr(time, 'isoformat') else str(time)
+
+        # Slide the Sharpe window: add the new value, subtract the one falling out
+        if len(self.window) == self.sharpe_window:
+            oldest = self.window[0]
+            self.window_sum -= oldest
+            self.window_sum_sq -= oldest * oldest
+        self.window.append(pnl)
+        self.window_sum += pnl
+        self.window_sum_sq += pnl * pnl
+
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= self.sharpe_window:
+            self._resync()
+
+    def update_many(self, values, times=None) -> None:
+        """
+        Adds the P/L of several quarter-hours (e.g. a new day) in order.
+
+        Args:
+            values (iterable): P/L per quarter-hour.
+            times (iterable): Time of every quarter-hour (optional).
+        """
+        if times is None:
+            for pnl in values:
+                self.update(pnl)
+        else:
+            for pnl, time in zip(values, times):
+                self.update(pnl, time)
+
+    def _resync(self) -> None:
+        # Recompute the window sums exactly (amortised O(1): once per window length of updates)
+        self.window_sum = math.fsum(self.window)
+        self.window_sum_sq = math.fsum(value * value for value in self.window)
+        self._updates_since_resync = 0
+
+    @property
+    def num_trades(self) -> int:
+        return self.profitable_trades + self.losing_trades
+
+    @property
+    def win_rate(self) -> float:
+        return self.profitable_trades * 100 / self.num_trades if self.num_trades else 0.0
+
+    @property
+    def drawdown(self) -> float:
+        """
+        The current fall of the cumulative P/L below its running peak, as a negative number.
+        """
+        return self.total_pnl - self.peak if self.peak is not None else 0.0
+
+    @property
+    def rolling_sharpe(self) -> float:
+        """
+        The annualised Sharpe ratio (mean over sample standard deviation) of the P/L in the window,
+        NaN with fewer than 2 values or without variation.
+        """
+        n = len(self.window)
+        if n < 2:
+            return math.nan
+        mean = self.window_sum / n
+        variance = max(self.window_sum_sq - n * mean * mean, 0.0) / (n - 1)
+        if variance <= 1e-12 * max(1.0, mean * mean):
+            return math.nan
+        return mean / math.sqrt(variance) * math.sqrt(self.periods_per_year)
+
+    def metrics(self) -> dict:
+        """
+        Returns the current metrics, named as in signal_evaluation.pnl_metrics.
+
+        Returns:
+            dict: 'Total P/L', 'Max Drawdown', 'Drawdown', 'Number of Trades', 'Profitable Trades',
+            'Losing Trades', 'Win Rate (%)' and 'Rolling Sharpe'.
+        """
+        return {
+            'Total P/L': self.total_pnl,
+            'Max Drawdown': self.max_drawdown,
+            'Drawdown': self.drawdown,
+            'Number of Trades': self.num_trades,
+            'Profitable Trades': self.profitable_trades,
+            'Losing Trades': self.losing_trades,
+            'Win Rate (%)': self.win_rate,
+            'Rolling Sharpe': self.rolling_sharpe,
+        }
+
+    def state_dict(self) -> dict:
+        """
+        Returns the state as a JSON-serialisable dict (see from_state).
+        """
+        return {
+            'sharpe_window': self.sharpe_window,
+            'periods_per_year': self.periods_per_year,
+            'count': self.count,
+            'total_pnl': self.total_pnl,
+            'peak': self.peak,
+            'max_drawdown': self.max_drawdown,
+            'profitable_trades': self.profitable_trades,
+            'losing_trades': self.losing_trades,
+            'last_time': self.last_time,
+            'window': list(self.window),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'OnlineMetrics':
+        """
+        Restores an accumulator from a dict returned by state_dict.
+
+        Raises:
+            ValueError: If the state is missing a field.
+        """
+        try:
+            metrics = cls(state['sharpe_window'], state['periods_per_year'])
+            metrics.count = state['count']
+            metrics.total_pnl = state['total_pnl']
+            metrics.peak = state['peak']
+            metrics.max_drawdown = state['max_drawdown']
+            metrics.profitable_trades = state['profitable_trades']
+            metrics.losing_trades = state['losing_trades']
+            metrics.last_time = state['last_time']
+            metrics.window.extend(state['window'])
+        except KeyError as e:
+            raise ValueError(f"Invalid metrics state, missing {e}")
+        metrics._resync()
+        return metrics
+
+    def save(self, path: str) -> None:
+        """
+        Writes the state to a JSON file, replacing it atomically so a crash never leaves a partial state.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'OnlineMetrics':
+        """
+        Reads the state written by save.
+        """
+        with open(path) as f:
+            return cls.from_state(json.load(f))
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update the strategy metrics with P/L values read from stdin")
+    parser.add_argument('--state', default='metrics_state.json', help="State file, resumed from if it exists")
+    parser.add_argument('--sharpe-window', type=int, default=SHARPE_WINDOW, help="Quarter-hours of the rolling Sharpe ratio (new state only)")
+    parser.add_argument('--save-every', type=int, default=96, help="Save the state every N quarter-hours (default: one day)")
+    args = parser.parse_args()
+    if args.save_every < 1:
+        parser.error("--save-every must be at least 1")
+
+    online_metrics = OnlineMetrics.load(args.state) if os.path.exists(args.state) else OnlineMetrics(args.sharpe_window)
+
+    # Input: one quarter-hour per line, as "<P/L>" or "<time>,<P/L>". The state is saved periodically
+    # and on exit, so a long-running stream that is killed loses at most save_every quarter-hours.
+    try:
+        for line_number, line in enumerate(sys.stdin, 1):
+            fields = line.strip().split(',')
+            if fields == ['']:
+                continue
+            try:
+                online_metrics.update(fields[-1], fields[0] if len(fields) > 1 else None)
+            except ValueError:
+                # e.g. a CSV header
+                print(f"Skipping line {line_number}, not a P/L value: {line.strip()!r}", file=sys.stderr)
+                continue
+            if online_metrics.count % args.save_every == 0:
+                online_metrics.save(args.state)
+    finally:
+        online_metrics.save(args.state)
+
+    print(f"Quarter-hours: {online_metrics.count} (last: {online_metrics.last_time})")
+    for name, value in online_metrics.metrics().items():
+        print(f"{name}: {value:,}" if isinstance(value, int) else f"{name}: {value:,.2f}")
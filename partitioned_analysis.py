@@ -0,0 +1,144 @@
+import argparse
+import glob
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from analysis_pipeline import STAGE_CACHE_DIR
+from Task_2 import build_pipeline, value_factors
+
+# ## Multi-year, multi-zone Task 2 analysis
+
+# One input workbook (e.g. one year of one bidding zone), named after its file
+AnalysisPartition = namedtuple('AnalysisPartition', ['path', 'name'])
+
+# Stages computed for every partition: hourly aggregation, value factors, extreme days and battery revenue
+PARTITION_STAGES = ['2.1', '2.3', '2.4', '2.6']
+
+def discover_analysis_partitions(paths) -> list:
+    """
+    Finds the input workbooks among the given files and directories.
+
+    Args:
+        paths (iterable of str): Workbook files, or directories whose *.xlsx files are all used.
+
+    Returns:
+        list: The AnalysisPartition of every workbook, sorted by name (the file name without extension).
+
+    Raises:
+        ValueError: If two workbooks have the same name.
+    """
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, '*.xlsx'))) if os.path.isdir(path) else [path]
+
+    partitions = {}
+    for path in files:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in partitions:
+            raise ValueError(f"Duplicate partition name '{name}' ({partitions[name].path} and {path})")
+        partitions[name] = AnalysisPartition(path, name)
+    return [partitions[name] for name in sorted(partitions)]
+
+def _analyse_partition(partition: AnalysisPartition, cache_dir: str) -> dict:
+    # Runs in a worker process: compute (or load the memoized) stages of one workbook
+    return build_pipeline(partition.path, cache_dir).run(PARTITION_STAGES)
+
+def _with_partition(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    # A copy of a partition's table with the partition name as its first column
+    return pd.concat([pd.Series(name, index=df.index, name='partition'), df], axis=1)
+
+def merge_partition_results(results: dict) -> dict:
+    """
+    Merges the per-partition stage results into per-partition and combined tables.
+
+    Args:
+        results (dict): A mapping of partition name to its stage results (as returned by Pipeline.run).
+
+    Returns:
+        dict: The merged tables:
+            'hourly': the hourly aggregation of every partition, with a 'partition' column.
+            'value_factors': average DA price and wind/PV value per MWh, one row per partition plus 'combined'.
+            'extreme_days': days with the highest and lowest renewable production, one row per partition
+                plus 'combined' (the extremes across all partitions).
+            'battery_revenue': the daily revenue-maximising pairs of every partition, with a 'partition' column.
+            'battery_revenue_totals': total battery revenue, one value per partition plus 'combined'.
+    """
+    names = list(results)
+    hourly = pd.concat([_with_partition(results[name]['2.1'], name) for name in names], ignore_index=True)
+
+    # The combined value factors are energy-weighted over every hour of every partition
+    factors = pd.DataFrame([results[name]['2.3'] for name in names], index=names)
+    factors.loc['combined'] = value_factors(hourly)
+
+    extremes = pd.DataFrame([{
+        'max date': results[name]['2.4']['max']['date'],
+        'max renewable (MW)': results[name]['2.4']['max']['Total Renewable Day Ahead Forecast (MW)'],
+        'max day DA price': results[name]['2.4']['max']['Day Ahead Price hourly [in EUR/MWh]'],
+        'min date': results[name]['2.4']['min']['date'],
+        'min renewable (MW)': results[name]['2.4']['min']['Total Renewable Day Ahead Forecast (MW)'],
+        'min day DA price': results[name]['2.4']['min']['Day Ahead Price hourly [in EUR/MWh]'],
+    } for name in names], index=names)
+    highest = extremes['max renewable (MW)'].idxmax()
+    lowest = extremes['min renewable (MW)'].idxmin()
+    extremes.loc['combined'] = extremes.loc[highest, ['max date', 'max renewable (MW)', 'max day DA price']].tolist() + \
+        extremes.loc[lowest, ['min date', 'min renewable (MW)', 'min day DA price']].tolist()
+
+    revenue = pd.concat([_with_partition(results[name]['2.6'], name) for name in names], ignore_index=True)
+    revenue_totals = revenue.groupby('partition', sort=False)['revenue'].sum()
+    revenue_totals.loc['combined'] = revenue_totals.sum()
+
+    return {
+        'hourly': hourly,
+        'value_factors': factors,
+        'extreme_days': extremes,
+        'battery_revenue': revenue,
+        'battery_revenue_totals': revenue_totals,
+    }
+
+def run_partitioned(paths, max_workers: int = None, cache_dir: str = STAGE_CACHE_DIR) -> dict:
+    """
+    Runs the Task 2 analyses over many workbooks, one partition per task in a process pool.
+
+    Each partition is analysed independently (reusing its memoized stage results), so the wall time
+    scales with the number of cores rather than with the length of the history.
+
+    Args:
+        paths (iterable of str): Workbook files, or directories whose *.xlsx files are all used.
+        max_workers (int): Maximum number of worker processes (defaults to the number of CPUs).
+        cache_dir (str): Directory of the memoized stage results, None to memoize in memory only.
+
+    Returns:
+        dict: The merged tables, see merge_partition_results.
+    """
+    partitions = discover_analysis_partitions(paths)
+    if not partitions:
+        raise ValueError("No input workbooks found")
+
+    if len(partitions) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_analyse_partition, partitions, [cache_dir] * len(partitions)))
+    else:
+        # A single partition is not worth the cost of starting a pool
+        results = [_analyse_partition(partitions[0], cache_dir)]
+
+    return merge_partition_results({partition.name: result for partition, result in zip(partitions, results)})
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task 2 analyses over many years and bidding zones")
+    parser.add_argument('paths', nargs='+', help="Workbooks, or directories of workbooks (one per year and zone)")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute every stage instead of using memoized results")
+    args = parser.parse_args()
+
+    merged = run_partitioned(args.paths, args.workers, cache_dir=None if args.no_cache else STAGE_CACHE_DIR)
+
+    print("Average Value of Wind/Solar Power (EUR/MWh):")
+    print(merged['value_factors'].round(2))
+    print()
+    print("Days with Highest and Lowest Renewable Energy Production:")
+    print(merged['extreme_days'])
+    print()
+    print("Total Battery Revenue (EUR):")
+    print(merged['battery_revenue_totals'].round(2))
@@ -0,0 +1,158 @@
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from Task_1 import Trade_Aggregates
+from trade_store import DATABASE_PATH, database_signature
+
+# ## Multi-period partitioned trade store
+
+# Delivery-period tables are named epex_<month>_<day>_<start hour>_<end hour>, e.g. epex_12_20_12_13
+PERIOD_TABLE_PATTERN = re.compile(r'^epex_(\d{2})_(\d{2})_(\d{2})_(\d{2})$')
+
+# One delivery-period table in one database file
+Partition = namedtuple('Partition', ['db_path', 'table', 'period'])
+
+def parse_period(period: str) -> tuple:
+    """
+    Parses a delivery period (or a prefix of one) into a sortable key.
+
+    Args:
+        period (str): A period such as '12_20_12_13', or a prefix such as '12_20' for a whole day.
+
+    Returns:
+        tuple: The period as a tuple of integers, e.g. (12, 20, 12, 13).
+
+    Raises:
+        ValueError: If the period is not made of up to four underscore-separated two-digit numbers.
+    """
+    if not re.fullmatch(r'\d{2}(_\d{2}){0,3}', period):
+        raise ValueError(f"Invalid delivery period '{period}', expected e.g. '12_20_12_13' or '12_20'")
+    return tuple(int(part) for part in period.split('_'))
+
+def discover_partitions(db_paths) -> list:
+    """
+    Finds every delivery-period table in the given database files.
+
+    Args:
+        db_paths (iterable of str): Paths to the SQLite database files to scan.
+
+    Returns:
+        list: The Partition of every epex_* table, sorted by delivery period.
+    """
+    partitions = []
+    for db_path in db_paths:
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        for (table,) in tables:
+            match = PERIOD_TABLE_PATTERN.match(table)
+            if match:
+                partitions.append(Partition(db_path, table, '_'.join(match.groups())))
+    return sorted(partitions, key=lambda partition: parse_period(partition.period))
+
+def _aggregate_partition(partition: Partition) -> Trade_Aggregates:
+    # Runs in a worker process: open a private read-only connection and aggregate inside SQLite
+    with sqlite3.connect(f"file:{partition.db_path}?mode=ro", uri=True) as conn:
+        return Trade_Aggregates.from_sql(conn, partition.table)
+
+class PartitionedTradeStore:
+    """
+    Volume and PnL aggregates over every delivery-period table of one or more database files.
+
+    Partitions are aggregated in a process pool, one partition per task, and the partial results are
+    cached per database file until the file or its write-ahead log changes (modification time or size).
+    The pool is created once with the store and reused by every refresh. Its workers are spawned, not
+    forked, so a refresh from a thread of a multi-threaded server never forks a process holding
+    another thread's locks; they start on the first refresh that needs them.
+
+    Args:
+        db_paths (iterable of str): Paths to the SQLite database files holding the epex_* tables.
+        max_workers (int): Maximum number of worker processes (defaults to the number of CPUs).
+
+    Methods:
+        period_aggregates(from_period, to_period): Returns the aggregates of each period in the range.
+        totals(from_period, to_period): Returns the aggregates merged across the periods in the range.
+        close(): Shuts down the worker processes.
+    """
+    def __init__(self, db_paths=(DATABASE_PATH,), max_workers: int = None):
+        self.db_paths = list(db_paths)
+        self.max_workers = max_workers
+        self._cache = {}  # db_path -> (file signature, {period: Trade_Aggregates})
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context('spawn'))
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes of the pool.
+        """
+        self._pool.shutdown()
+
+    def _refresh(self) -> None:
+        # Only re-aggregate the database files that changed since they were last aggregated
+        stale, signatures = [], {}
+        for db_path in self.db_paths:
+            signatures[db_path] = tuple(database_signature(db_path))
+            if self._cache.get(db_path, (None,))[0] != signatures[db_path]:
+                stale.append(db_path)
+        if not stale:
+            return
+
+        partitions = discover_partitions(stale)
+        if len(partitions) > 1:
+            results = list(self._pool.map(_aggregate_partition, partitions))
+        else:
+            # A single partition is not worth a round trip to the pool
+            results = [_aggregate_partition(partition) for partition in partitions]
+
+        for db_path in stale:
+            self._cache[db_path] = (signatures[db_path], {})
+        for partition, aggregates in zip(partitions, results):
+            self._cache[partition.db_path][1][partition.period] = aggregates
+
+    def period_aggregates(self, from_period: str = None, to_period: str = None) -> dict:
+        """
+        Returns the aggregates of each delivery period in the (inclusive) range.
+
+        Args:
+            from_period (str): First period (or period prefix) to include, None for no lower bound.
+            to_period (str): Last period (or period prefix) to include, None for no upper bound.
+
+        Returns:
+            dict: A mapping of delivery period to its Trade_Aggregates, sorted by period.
+        """
+        lower = parse_period(from_period) if from_period else None
+        upper = parse_period(to_period) if to_period else None
+
+        with self._lock:
+            self._refresh()
+            selected = {}
+            for _, period_aggregates in self._cache.values():
+                for period, aggregates in period_aggregates.items():
+                    key = parse_period(period)
+                    # Compare on the prefix length of the bound so that e.g. '12_20' covers the whole day
+                    if lower is not None and key[:len(lower)] < lower:
+                        continue
+                    if upper is not None and key[:len(upper)] > upper:
+                        continue
+                    # The same period may be split across several files
+                    selected.setdefault(period, Trade_Aggregates()).merge(aggregates)
+
+        return dict(sorted(selected.items(), key=lambda item: parse_period(item[0])))
+
+    def totals(self, from_period: str = None, to_period: str = None) -> Trade_Aggregates:
+        """
+        Returns the aggregates merged across every delivery period in the (inclusive) range.
+
+        Args:
+            from_period (str): First period (or period prefix) to include, None for no lower bound.
+            to_period (str): Last period (or period prefix) to include, None for no upper bound.
+
+        Returns:
+            Trade_Aggregates: The merged aggregates.
+        """
+        total = Trade_Aggregates()
+        for aggregates in self.period_aggregates(from_period, to_period).values():
+            total.merge(aggregates)
+        return total
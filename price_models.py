@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from sklearn.ensemble import RandomForestRegressor
+from trading_features import FEATURE_COLUMNS, TARGET_COLUMN
+
+# ## Persisted next-day intraday price models (Task 2.7.6)
+
+# Default directory of the persisted models
+MODEL_DIR = 'models'
+
+# Arrays of the flattened forest, memory-mapped on load
+FOREST_ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'roots']
+
+# Input fields of one day in a prediction request, in the order of FEATURE_COLUMNS
+DAY_FIELDS = ['intra_price', 'da_price', 'wind_da_forecast', 'pv_da_forecast']
+
+def train_models(d1: pd.DataFrame, n_estimators: int = 100, random_state: int = 42) -> tuple:
+    """
+    Fits the OLS and Random Forest models of Tasks 2.7.2 and 2.7.4 on every row with a target.
+
+    Args:
+        d1 (pd.DataFrame): The feature frame of Task 2.7.1 (see trading_features.feature_frame).
+        n_estimators (int): Number of trees of the forest.
+        random_state (int): Random seed of the forest.
+
+    Returns:
+        tuple: The OLS coefficients (intercept first, then one per feature) and the fitted RandomForestRegressor.
+    """
+    data = d1.dropna(subset=[TARGET_COLUMN])
+    X, y = data[FEATURE_COLUMNS].to_numpy(dtype=float), data[TARGET_COLUMN].to_numpy(dtype=float)
+    ols_coefficients = sm.OLS(y, sm.add_constant(X, has_constant='add')).fit().params
+    rf_model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state, n_jobs=-1).fit(X, y)
+    return np.asarray(ols_coefficients), rf_model
+
+def save_models(ols_coefficients, rf_model: RandomForestRegressor, model_dir: str = MODEL_DIR) -> None:
+    """
+    Writes the OLS coefficients and the forest to `.npy` files.
+
+    The trees are flattened into one set of node arrays (child indices offset per tree; leaves are
+    their own children), so loading is a handful of memory maps instead of unpickling thousands of
+    objects.
+
+    Args:
+        ols_coefficients (array-like): The OLS coefficients, intercept first.
+        rf_model (RandomForestRegressor): The fitted forest.
+        model_dir (str): Directory to write the models to.
+    """
+    trees = [estimator.tree_ for estimator in rf_model.estimators_]
+    sizes = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    def offset_children(children, root):
+        # Leaves point to themselves, so walking past a leaf stays on it
+        return np.where(children >= 0, children, np.arange(len(children))) + root
+
+    arrays = {
+        'left': np.concatenate([offset_children(tree.children_left, root) for tree, root in zip(trees, roots)]).astype(np.int64),
+        'right': np.concatenate([offset_children(tree.children_right, root) for tree, root in zip(trees, roots)]).astype(np.int64),
+        'feature': np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int32),
+        'threshold': np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+        'value': np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+        'roots': roots.astype(np.int64),
+    }
+
+    # Drop the old metadata first, so an interrupted save never leaves models that look complete
+    os.makedirs(model_dir, exist_ok=True)
+    meta_path = os.path.join(model_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    # Each array replaces its file atomically: a running server may have the old one memory-mapped
+    _save_array(os.path.join(model_dir, 'ols.npy'), np.asarray(ols_coefficients, dtype=np.float64))
+    for name, values in arrays.items():
+        _save_array(os.path.join(model_dir, f"forest_{name}.npy"), values)
+
+    # Metadata is written last and marks the models as complete
+    with open(meta_path, 'w') as f:
+        json.dump({'features': FEATURE_COLUMNS, 'trees': len(trees), 'nodes': int(sizes.sum())}, f)
+
+def _save_array(path: str, values: np.ndarray) -> None:
+    # Write to a temporary file and rename it over the old one, which keeps existing mappings valid
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+class PriceModel:
+    """
+    Persisted OLS and Random Forest models predicting the next-day intraday price.
+
+    The forest's node arrays are memory-mapped, so loading is near-instant whatever the forest's
+    size, and all trees are evaluated together: every step moves each (tree, row) pair one level
+    down with NumPy indexing, and only the pairs not yet at a leaf are kept for the next step.
+
+    Args:
+        model_dir (str): Directory written by save_models.
+
+    Raises:
+        FileNotFoundError: If no complete models are saved in model_dir.
+        ValueError: If the models were saved with other features than FEATURE_COLUMNS.
+
+    Methods:
+        predict(X): Returns the OLS and Random Forest predictions for a feature matrix.
+        predict_days(days): Returns the predictions for several days of inputs.
+    """
+    def __init__(self, model_dir: str = MODEL_DIR):
+        with open(os.path.join(model_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('features') != FEATURE_COLUMNS:
+            raise ValueError(f"The models in {model_dir} were saved with the features {self.meta.get('features')}, "
+                             f"expected {FEATURE_COLUMNS}; retrain them")
+        self.ols_coefficients = np.load(os.path.join(model_dir, 'ols.npy'))
+        self.forest = {name: np.load(os.path.join(model_dir, f"forest_{name}.npy"), mmap_mode='r') for name in FOREST_ARRAYS}
+
+    def predict_forest(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the Random Forest predictions (the mean over the trees) for a feature matrix.
+        """
+        left, right = self.forest['left'], self.forest['right']
+        feature, threshold, value = self.forest['feature'], self.forest['threshold'], self.forest['value']
+
+        # The trees compare float32 features, as in scikit-learn
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))
+
+        # One entry per (tree, row) pair; only the pairs not yet at a leaf are moved down
+        nodes = np.repeat(np.asarray(self.forest['roots']), len(X))
+        pair_rows = np.tile(rows, len(self.forest['roots']))
+        active = np.flatnonzero(left[nodes] != nodes)
+        while len(active):
+            current = nodes[active]
+            go_left = X[pair_rows[active], feature[current]] <= threshold[current]
+            nodes[active] = np.where(go_left, left[current], right[current])
+            active = active[left[nodes[active]] != nodes[active]]
+        return value[nodes].reshape(-1, len(X)).mean(axis=0)
+
+    def predict(self, X) -> dict:
+        """
+        Returns the predictions of both models.
+
+        Args:
+            X (array-like): Feature matrix with one column per feature of FEATURE_COLUMNS.
+
+        Returns:
+            dict: 'ols' and 'rf' predictions, one per row.
+        """
+        X = np.asarray(X, dtype=float)
+        return {
+            'ols': self.ols_coefficients[0] + X @ self.ols_coefficients[1:],
+            'rf': self.predict_forest(X),
+        }
+
+    def predict_days(self, days: list) -> list:
+        """
+        Returns the predictions for several days in one batch.
+
+        Args:
+            days (list): One dict per day with 'date' and the lists 'intra_price', 'da_price',
+                'wind_da_forecast' and 'pv_da_forecast' (one value per quarter-hour, normally 96).
+
+        Returns:
+            list: One dict per day with 'date', and the 'ols' and 'rf' predictions per quarter-hour.
+
+        Raises:
+            ValueError: If a day is malformed.
+        """
+        matrices = [day_features(day) for day in days]
+        predictions = self.predict(np.concatenate(matrices)) if matrices else {'ols': [], 'rf': []}
+
+        results, start = [], 0
+        for day, matrix in zip(days, matrices):
+            end = start + len(matrix)
+            results.append({
+                'date': day.get('date'),
+                'ols': predictions['ols'][start:end].tolist(),
+                'rf': predictions['rf'][start:end].tolist(),
+            })
+            start = end
+        return results
+
+def day_features(day: dict) -> np.ndarray:
+    """
+    Builds the feature matrix of one day of a prediction request.
+
+    Raises:
+        ValueError: If a field is missing, not a list of finite numbers, or of a different length than the others.
+    """
+    if not isinstance(day, dict):
+        raise ValueError("Each day must be an object")
+    columns = []
+    for field in DAY_FIELDS:
+        values = day.get(field)
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"Field '{field}' must be a non-empty list of numbers")
+        try:
+            columns.append(np.asarray(values, dtype=float))
+        except (TypeError, ValueError):
+            raise ValueError(f"Field '{field}' must be a non-empty list of numbers")
+        if columns[-1].ndim != 1 or len(columns[-1]) != len(columns[0]):
+            raise ValueError(f"Field '{field}' must have one value per quarter-hour, like '{DAY_FIELDS[0]}'")
+        # null and "nan" convert to NaN, which would give NaN predictions (invalid JSON)
+        if not np.isfinite(columns[-1]).all():
+            raise ValueError(f"Field '{field}' must only hold finite numbers")
+    return np.column_stack(columns)
+
+# Example usage
+if __name__ == "__main__":
+    from analysis_data import DATA_FILE, load_analysis_data
+    from trading_features import feature_frame
+
+    parser = argparse.ArgumentParser(description="Train or query the next-day intraday price models")
+    parser.add_argument('command', choices=['train', 'predict'], help="'train' saves the models, 'predict' reads days as JSON from stdin")
+    parser.add_argument('--data', default=DATA_FILE, help="Path to the analysis workbook (train)")
+    parser.add_argument('--model-dir', default=MODEL_DIR, help="Directory of the persisted models")
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        ols_coefficients, rf_model = train_models(feature_frame(load_analysis_data(args.data)))
+        save_models(ols_coefficients, rf_model, args.model_dir)
+        print(f"Saved the models to {args.model_dir}")
+    else:
+        # Input: {"days": [{"date": "2022-01-01", "intra_price": [...], "da_price": [...], ...}, ...]}
+        request_body = json.load(sys.stdin)
+        print(json.dumps({'predictions': PriceModel(args.model_dir).predict_days(request_body['days'])}))
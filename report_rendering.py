@@ -0,0 +1,223 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# ## Headless, downsampled report rendering
+
+# Default number of points drawn per series, and default output formats
+MAX_POINTS = 2000
+REPORT_FORMATS = ('png', 'svg')
+
+def _as_float(x) -> np.ndarray:
+    # Datetimes are compared as nanoseconds since the epoch
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+def lttb_indices(x, y, max_points: int = MAX_POINTS) -> np.ndarray:
+    """
+    Selects the points of a series to keep with Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. The points in between are split into max_points - 2
+    buckets, and from each bucket the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is kept, which preserves peaks, troughs and trends.
+
+    Args:
+        x (array-like): The x values (numbers or datetimes), in increasing order.
+        y (array-like): The y values, without NaNs.
+        max_points (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: The indices of the kept points, in increasing order.
+    """
+    num_points = len(y)
+    if max_points >= num_points or max_points < 3:
+        return np.arange(num_points)
+
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    bucket_size = (num_points - 2) / (max_points - 2)
+    edges = (np.arange(max_points - 1) * bucket_size).astype(int) + 1  # Bucket i is edges[i]:edges[i + 1]
+    edges[-1] = num_points - 1
+
+    indices = np.empty(max_points, dtype=int)
+    indices[0], indices[-1] = 0, num_points - 1
+    kept = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # The average of the next bucket (the last point, for the last bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else num_points
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        area = np.abs((x[kept] - avg_x) * (y[start:end] - y[kept]) - (x[kept] - x[start:end]) * (avg_y - y[kept]))
+        kept = start + int(area.argmax())
+        indices[i + 1] = kept
+    return indices
+
+def minmax_indices(y, max_points: int = MAX_POINTS) -> np.ndarray:
+    """
+    Selects the points of a series to keep with min/max bucketing.
+
+    The series is split into max_points // 2 buckets of equal length and the minimum and maximum of
+    every bucket are kept (plus the first and last points), all in one vectorized pass.
+
+    Args:
+        y (array-like): The y values.
+        max_points (int): Approximate number of points to keep.
+
+    Returns:
+        np.ndarray: The indices of the kept points, in increasing order.
+    """
+    y = np.asarray(y, dtype=float)
+    num_points = len(y)
+    num_buckets = max(max_points // 2, 1)
+    if max_points >= num_points:
+        return np.arange(num_points)
+
+    bucket_size = -(-num_points // num_buckets)
+    num_buckets = -(-num_points // bucket_size)
+    buckets = np.full(num_buckets * bucket_size, np.nan)
+    buckets[:num_points] = y
+    buckets = buckets.reshape(num_buckets, bucket_size)
+
+    offsets = np.arange(num_buckets) * bucket_size
+    extremes = np.concatenate([offsets + np.nanargmin(buckets, axis=1), offsets + np.nanargmax(buckets, axis=1)])
+    return np.unique(np.concatenate([[0, num_points - 1], extremes]))
+
+def downsample(x, y, max_points: int = MAX_POINTS, method: str = 'lttb') -> tuple:
+    """
+    Downsamples a series to at most (about) max_points points, keeping its shape.
+
+    Args:
+        x (array-like): The x values (numbers or datetimes), in increasing order.
+        y (array-like): The y values.
+        max_points (int): Number of points to keep.
+        method (str): 'lttb' or 'minmax'.
+
+    Returns:
+        tuple: The kept x and y values, as NumPy arrays.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if method == 'lttb':
+        indices = lttb_indices(x, y, max_points)
+    elif method == 'minmax':
+        indices = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}', expected 'lttb' or 'minmax'")
+    return x[indices], y[indices]
+
+def _thousands(value, tick_pos) -> str:
+    return f'{int(value):,}'
+
+def render_line_chart(path_stem: str, formats, series: list, title: str, xlabel: str, ylabel: str,
+                      figsize=(12, 6), legend_title: str = None, thousands_yaxis: bool = False) -> list:
+    """
+    Renders a line chart to files with the non-interactive Agg backend (no display needed).
+
+    Args:
+        path_stem (str): Output path without extension.
+        formats (iterable of str): File formats, e.g. ('png', 'svg').
+        series (list): (x, y, label, color) of every line.
+        title (str): Chart title.
+        xlabel (str): X axis label.
+        ylabel (str): Y axis label.
+        figsize (tuple): Figure size in inches.
+        legend_title (str): Title of the legend, None for no legend.
+        thousands_yaxis (bool): Whether to format the y axis ticks with thousands separators.
+
+    Returns:
+        list: The paths of the written files.
+    """
+    # The object-oriented API renders without pyplot, so no GUI backend is ever loaded
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    for x, y, label, color in series:
+        ax.plot(x, y, label=label, color=color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if thousands_yaxis:
+        ax.yaxis.set_major_formatter(FuncFormatter(_thousands))
+    ax.grid(True)
+    if legend_title is not None:
+        ax.legend(title=legend_title)
+
+    paths = []
+    for fmt in formats:
+        paths.append(f"{path_stem}.{fmt}")
+        fig.savefig(paths[-1], format=fmt)
+    return paths
+
+class ReportRenderer:
+    """
+    Renders report figures to files in a background worker thread.
+
+    Series are downsampled when they are queued (so only a few thousand points are ever drawn), and
+    rendering happens while the caller keeps computing. Rendering time and file size
+    therefore stay constant no matter how long the history is.
+
+    Args:
+        output_dir (str): Directory of the rendered files.
+        formats (iterable of str): File formats, e.g. ('png', 'svg').
+        max_points (int): Maximum number of points drawn per series.
+        method (str): Downsampling method, 'lttb' or 'minmax'.
+
+    Methods:
+        line_chart(name, series, ...): Queues a line chart and returns a future of its file paths.
+        close(): Waits for every queued chart and returns the paths of all written files.
+    """
+    def __init__(self, output_dir: str = 'reports', formats=REPORT_FORMATS, max_points: int = MAX_POINTS,
+                 method: str = 'lttb'):
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.max_points = max_points
+        self.method = method
+        self._futures = []
+        # One worker, since a script's figures are few; figures never touch pyplot, so a thread is safe
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        os.makedirs(output_dir, exist_ok=True)
+
+    def line_chart(self, name: str, series: list, title: str, xlabel: str, ylabel: str, **options):
+        """
+        Queues a line chart for rendering.
+
+        Args:
+            name (str): File name of the chart, without extension.
+            series (list): (x, y, label, color) of every line.
+            title (str): Chart title.
+            xlabel (str): X axis label.
+            ylabel (str): Y axis label.
+            **options: figsize, legend_title and thousands_yaxis, see render_line_chart.
+
+        Returns:
+            concurrent.futures.Future: The future list of written file paths.
+        """
+        series = [downsample(x, y, self.max_points, self.method) + (label, color) for x, y, label, color in series]
+        future = self._pool.submit(render_line_chart, os.path.join(self.output_dir, name), self.formats,
+                                   series, title, xlabel, ylabel, **options)
+        self._futures.append(future)
+        return future
+
+    def close(self) -> list:
+        """
+        Waits for every queued chart and stops the worker.
+
+        Returns:
+            list: The paths of all written files.
+        """
+        try:
+            return [path for future in self._futures for path in future.result()]
+        finally:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
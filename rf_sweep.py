@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from signal_evaluation import strategy_pnl
+from trading_features import FEATURE_COLUMNS, TARGET_COLUMN, DA_PRICE_COLUMN, feature_frame
+
+# ## Parallel hyperparameter sweep of the Task 2.7.4 Random Forest
+
+# Default directory of the shared arrays and the checkpoint
+SWEEP_DIR = 'rf_sweep'
+
+# Default hyperparameter grid
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_leaf': [1, 5, 20],
+    'max_features': [1.0, 'sqrt'],
+}
+
+def _config_key(params: dict) -> str:
+    # Canonical form of a configuration, identifying it in the checkpoint
+    return json.dumps(params, sort_keys=True)
+
+def export_sweep_data(d1: pd.DataFrame, sweep_dir: str = SWEEP_DIR) -> str:
+    """
+    Writes the feature matrix, target and DA prices to `.npy` files that every worker memory-maps.
+
+    Args:
+        d1 (pd.DataFrame): The feature frame of Task 2.7.1 (see trading_features.feature_frame), in time order.
+        sweep_dir (str): Directory of the sweep.
+
+    Returns:
+        str: A hash of the data, so checkpointed results are only reused for the same data.
+    """
+    data = d1.dropna(subset=[TARGET_COLUMN])
+    arrays = {
+        'X': np.ascontiguousarray(data[FEATURE_COLUMNS].to_numpy(dtype=np.float64)),
+        'y': data[TARGET_COLUMN].to_numpy(dtype=np.float64),
+        'da_price': data[DA_PRICE_COLUMN].to_numpy(dtype=np.float64),
+    }
+    os.makedirs(sweep_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    for name, values in arrays.items():
+        np.save(os.path.join(sweep_dir, f"{name}.npy"), values)
+        digest.update(values.tobytes())
+    return digest.hexdigest()[:16]
+
+@lru_cache(maxsize=None)
+def _load_sweep_data(sweep_dir: str) -> tuple:
+    # Memory-mapped once per worker process; the pages are shared with every other worker through the OS cache
+    return tuple(np.load(os.path.join(sweep_dir, f"{name}.npy"), mmap_mode='r') for name in ('X', 'y', 'da_price'))
+
+def evaluate_config(params: dict, sweep_dir: str = SWEEP_DIR, num_splits: int = 5, gap: int = 96,
+                    random_state: int = 42) -> dict:
+    """
+    Evaluates one Random Forest configuration on time-ordered splits.
+
+    Every split trains on the rows before its test block only (with gap rows left out in between, so
+    no training target overlaps the test period) and evaluates MSE, R² and the P/L of the Task 2.7.3
+    buy/sell rule on the test block.
+
+    Args:
+        params (dict): RandomForestRegressor hyperparameters.
+        sweep_dir (str): Directory of the data written by export_sweep_data.
+        num_splits (int): Number of time-ordered splits.
+        gap (int): Number of rows between the training and test rows (96 = one day).
+        random_state (int): Random seed of the forest.
+
+    Returns:
+        dict: The parameters, and 'mse' and 'r2' (means over the splits) and 'pnl' (total over the test blocks).
+    """
+    X, y, da_price = _load_sweep_data(sweep_dir)
+    mse, r2, pnl = [], [], 0.0
+    for train, test in TimeSeriesSplit(n_splits=num_splits, gap=gap).split(X):
+        model = RandomForestRegressor(random_state=random_state, n_jobs=1, **params)
+        model.fit(X[train], y[train])
+        predictions = model.predict(X[test])
+        mse.append(mean_squared_error(y[test], predictions))
+        r2.append(r2_score(y[test], predictions))
+        pnl += strategy_pnl(predictions, da_price[test], y[test])['P/L'].sum()
+    return {'params': params, 'mse': float(np.mean(mse)), 'r2': float(np.mean(r2)), 'pnl': float(pnl)}
+
+def _setup_key(data_key: str, num_splits: int, gap: int, random_state: int) -> str:
+    # The data and the cross-validation setup; scores are only comparable within the same setup
+    return f"{data_key}:{num_splits}:{gap}:{random_state}"
+
+def _read_checkpoint(checkpoint_path: str, setup_key: str) -> dict:
+    # Finished configurations of an earlier run with the same data and CV setup (a partly written last line is ignored)
+    finished = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get('setup') == setup_key:
+                    finished[_config_key(record['params'])] = record
+    return finished
+
+def run_sweep(d1: pd.DataFrame, param_grid: dict = PARAM_GRID, sweep_dir: str = SWEEP_DIR, num_splits: int = 5,
+              gap: int = 96, max_workers: int = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    Sweeps Random Forest hyperparameters across a process pool, resuming from the checkpoint.
+
+    The data is written once to memory-mapped `.npy` files instead of being pickled to every task.
+    Every finished configuration is appended to `checkpoint.jsonl` in the sweep directory, so an
+    interrupted sweep skips the configurations it already evaluated when it is run again. Records are
+    keyed on the data and on num_splits, gap and random_state, so a rerun with another CV setup
+    evaluates every configuration again instead of mixing in incomparable scores.
+
+    Args:
+        d1 (pd.DataFrame): The feature frame of Task 2.7.1 (see trading_features.feature_frame), in time order.
+        param_grid (dict): Lists of values of every hyperparameter to sweep.
+        sweep_dir (str): Directory of the shared arrays and the checkpoint.
+        num_splits (int): Number of time-ordered splits.
+        gap (int): Number of rows between the training and test rows of a split (96 = one day).
+        max_workers (int): Maximum number of worker processes (defaults to the number of CPUs).
+        random_state (int): Random seed of the forests.
+
+    Returns:
+        pd.DataFrame: One row per configuration with its hyperparameters, 'mse', 'r2' and 'pnl', sorted by MSE.
+    """
+    setup_key = _setup_key(export_sweep_data(d1, sweep_dir), num_splits, gap, random_state)
+    checkpoint_path = os.path.join(sweep_dir, 'checkpoint.jsonl')
+    finished = _read_checkpoint(checkpoint_path, setup_key)
+
+    configs = list(ParameterGrid(param_grid))
+    pending = [params for params in configs if _config_key(params) not in finished]
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool, open(checkpoint_path, 'a') as checkpoint:
+            futures = [pool.submit(evaluate_config, params, sweep_dir, num_splits, gap, random_state) for params in pending]
+            for future in as_completed(futures):
+                record = dict(future.result(), setup=setup_key)
+                finished[_config_key(record['params'])] = record
+                checkpoint.write(json.dumps(record) + '\n')
+                checkpoint.flush()
+
+    records = [finished[_config_key(params)] for params in configs]
+    results = pd.DataFrame([dict(record['params'], mse=record['mse'], r2=record['r2'], pnl=record['pnl']) for record in records])
+    return results.sort_values('mse', ignore_index=True)
+
+# Example usage
+if __name__ == "__main__":
+    from analysis_data import DATA_FILE, load_analysis_data
+
+    parser = argparse.ArgumentParser(description="Random Forest hyperparameter sweep for the Task 2.7 strategy")
+    parser.add_argument('--data', default=DATA_FILE, help="Path to the analysis workbook")
+    parser.add_argument('--sweep-dir', default=SWEEP_DIR, help="Directory of the shared arrays and the checkpoint")
+    parser.add_argument('--splits', type=int, default=5, help="Number of time-ordered splits")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    results = run_sweep(feature_frame(load_analysis_data(args.data)), PARAM_GRID, args.sweep_dir, args.splits, max_workers=args.workers)
+    pd.set_option('display.float_format', '{:.2f}'.format)
+    print(results.to_string())
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# ## Request metrics in Prometheus text format
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+class Counter:
+    """
+    A monotonically increasing counter with optional labels.
+
+    Args:
+        name (str): Metric name.
+        help_text (str): Description shown in the exposition.
+    """
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    """
+    A latency histogram with cumulative buckets and optional labels.
+
+    Args:
+        name (str): Metric name.
+        help_text (str): Description shown in the exposition.
+        buckets (tuple): Upper bounds of the buckets, in increasing order.
+    """
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class PhaseTimer:
+    """
+    Times the phases of one request.
+
+    Methods:
+        phase(name): Context manager that times one phase.
+        total(): Returns the time since the timer was created.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+class ServiceMetrics:
+    """
+    The request, error, cache and latency metrics of the PnL service.
+
+    Args:
+        slow_request_threshold_s (float): Requests slower than this (in seconds) are logged with their
+            phase breakdown; None disables the slow-request log.
+
+    Methods:
+        record_request(endpoint, timer, error, cache_hit, rows_scanned): Records one finished request.
+        render(): Returns every metric in Prometheus text format.
+    """
+    def __init__(self, slow_request_threshold_s: float = None):
+        self.slow_request_threshold_s = slow_request_threshold_s
+        self.requests = Counter('pnl_requests_total', "Number of requests.")
+        self.errors = Counter('pnl_request_errors_total', "Number of requests that returned an error.")
+        self.cache_hits = Counter('pnl_cache_hits_total', "Number of requests answered from the cached trades.")
+        self.cache_misses = Counter('pnl_cache_misses_total', "Number of requests that had to reload the trades.")
+        self.rows_scanned = Counter('pnl_rows_scanned_total', "Number of trade rows read from the database.")
+        self.latency = Histogram('pnl_request_duration_seconds', "Request latency.")
+        self.phase_latency = Histogram('pnl_request_phase_duration_seconds', "Latency of each request phase.")
+
+    def record_request(self, endpoint: str, timer: PhaseTimer, error: bool = False,
+                       cache_hit: bool = None, rows_scanned: int = 0) -> None:
+        """
+        Records one finished request.
+
+        Args:
+            endpoint (str): Name of the endpoint.
+            timer (PhaseTimer): The request's phase timer.
+            error (bool): Whether the request returned an error.
+            cache_hit (bool): Whether the cached trades were current (None if the cache was not used).
+            rows_scanned (int): Number of trade rows read from the database.
+        """
+        total = timer.total()
+        self.requests.inc(endpoint=endpoint)
+        if error:
+            self.errors.inc(endpoint=endpoint)
+        if cache_hit is True:
+            self.cache_hits.inc(endpoint=endpoint)
+        elif cache_hit is False:
+            self.cache_misses.inc(endpoint=endpoint)
+        if rows_scanned:
+            self.rows_scanned.inc(rows_scanned, endpoint=endpoint)
+        self.latency.observe(total, endpoint=endpoint)
+        for phase, duration in timer.phases.items():
+            self.phase_latency.observe(duration, endpoint=endpoint, phase=phase)
+
+        if self.slow_request_threshold_s is not None and total > self.slow_request_threshold_s:
+            breakdown = ', '.join(f"{phase}={duration * 1000:.1f}ms" for phase, duration in timer.phases.items())
+            logger.warning("Slow request to %s took %.1fms (%s)", endpoint, total * 1000, breakdown)
+
+    def render(self) -> str:
+        """
+        Returns every metric in Prometheus text exposition format.
+        """
+        lines = []
+        for metric in (self.requests, self.errors, self.cache_hits, self.cache_misses,
+                       self.rows_scanned, self.latency, self.phase_latency):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
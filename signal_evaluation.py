@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# ## Vectorized signal-to-P/L evaluation of the Task 2.7 strategy
+
+def trade_prices(predictions, da_price, intra_next_price) -> tuple:
+    """
+    Applies the buy/sell rule of Task 2.7.3 to one or many prediction vectors at once.
+
+    If the prediction is above the DA price, buy at the DA price and sell at the next-day intraday
+    price; if it is below, do the reverse. Without a trade (equal or missing prediction) the P/L is 0.
+
+    Args:
+        predictions (array-like): Predicted next-day intraday prices, of shape (quarter-hours,) or
+            (models, quarter-hours).
+        da_price (array-like): DA prices, of shape (quarter-hours,).
+        intra_next_price (array-like): Realised next-day intraday prices, of shape (quarter-hours,).
+
+    Returns:
+        tuple: The buy prices, sell prices (NaN without a trade) and P/L (in EUR per MW), each of the
+        shape of predictions.
+    """
+    predictions = np.asarray(predictions, dtype=float)
+    da_price = np.asarray(da_price, dtype=float)
+    intra_next_price = np.asarray(intra_next_price, dtype=float)
+    buy_at_da = predictions > da_price
+    buy_at_intra = predictions < da_price
+
+    buy = np.where(buy_at_da, da_price, np.where(buy_at_intra, intra_next_price, np.nan))
+    sell = np.where(buy_at_da, intra_next_price, np.where(buy_at_intra, da_price, np.nan))
+    pnl = np.nan_to_num((sell - buy) / 4)  # Divide by 4 since the DA and Intra Price is constant across the hour
+    return buy, sell, pnl
+
+def strategy_pnl(predictions, da_price, intra_next_price) -> pd.DataFrame:
+    """
+    Applies the buy/sell rule of Task 2.7.3 to one prediction vector.
+
+    Args:
+        predictions (array-like): Predicted next-day intraday prices.
+        da_price (array-like): DA prices.
+        intra_next_price (array-like): Realised next-day intraday prices.
+
+    Returns:
+        pd.DataFrame: 'buy', 'sell' (NaN without a trade) and 'P/L' per quarter-hour (in EUR per MW).
+    """
+    buy, sell, pnl = trade_prices(predictions, da_price, intra_next_price)
+    return pd.DataFrame({'buy': buy, 'sell': sell, 'P/L': pnl})
+
+def pnl_metrics(pnl) -> pd.DataFrame:
+    """
+    Computes the Task 2.7.7 performance metrics of one or many P/L series at once.
+
+    Args:
+        pnl (array-like): P/L per quarter-hour, of shape (quarter-hours,) or (models, quarter-hours).
+
+    Returns:
+        pd.DataFrame: One row per series with 'Total P/L', 'Max Drawdown' (the largest fall of the
+        cumulative P/L below its running peak, as a negative number), 'Number of Trades' (non-zero
+        P/L), 'Profitable Trades' and 'Win Rate (%)'.
+    """
+    pnl = np.atleast_2d(np.asarray(pnl, dtype=float))
+    cumulative = np.cumsum(pnl, axis=1)
+    drawdown = cumulative - np.maximum.accumulate(cumulative, axis=1)
+
+    trades = np.count_nonzero(pnl, axis=1)
+    profitable = np.count_nonzero(pnl > 0, axis=1)
+    return pd.DataFrame({
+        'Total P/L': cumulative[:, -1] if pnl.shape[1] else np.zeros(len(pnl)),
+        'Max Drawdown': drawdown.min(axis=1, initial=0),
+        'Number of Trades': trades,
+        'Profitable Trades': profitable,
+        'Win Rate (%)': np.divide(profitable * 100, trades, out=np.zeros(len(pnl)), where=trades > 0),
+    })
+
+def evaluate_signals(predictions, da_price, intra_next_price, model_names=None) -> tuple:
+    """
+    Evaluates the strategy for many models in one broadcast pass.
+
+    Args:
+        predictions (array-like): Predicted next-day intraday prices, of shape (models, quarter-hours).
+        da_price (array-like): DA prices, of shape (quarter-hours,).
+        intra_next_price (array-like): Realised next-day intraday prices, of shape (quarter-hours,).
+        model_names (list): Names of the models, used as the index of the summary.
+
+    Returns:
+        tuple: The P/L per model and quarter-hour (array of shape (models, quarter-hours)) and the
+        summary of every model (see pnl_metrics).
+    """
+    predictions = np.atleast_2d(np.asarray(predictions, dtype=float))
+    _, _, pnl = trade_prices(predictions, da_price, intra_next_price)
+    summary = pnl_metrics(pnl)
+    if model_names is not None:
+        summary.index = list(model_names)
+    return pnl, summary
@@ -0,0 +1,198 @@
+import math
+import os
+import sqlite3
+import threading
+import pandas as pd
+from Task_1 import Trade_Aggregates
+from service_metrics import PhaseTimer
+
+# ## Process-wide trade store
+
+# Default database file and delivery-period table served by the reporting tool
+DATABASE_PATH = 'trades.sqlite'
+TRADES_TABLE = 'epex_12_20_12_13'
+
+def database_signature(db_path: str) -> list:
+    """
+    Returns the modification time and size of a database file and of its write-ahead log.
+
+    In WAL mode, committed writes go to the `-wal` file and leave the main file untouched until the
+    next checkpoint, so the signature of the main file alone does not change when trades are inserted.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        list: [mtime_ns, size] of the database file, followed by those of the `-wal` file ([0, 0] if there is none).
+    """
+    stat = os.stat(db_path)
+    try:
+        wal_stat = os.stat(f"{db_path}-wal")
+        wal_signature = [wal_stat.st_mtime_ns, wal_stat.st_size]
+    except FileNotFoundError:
+        wal_signature = [0, 0]
+    return [stat.st_mtime_ns, stat.st_size] + wal_signature
+
+class TradeStore:
+    """
+    An in-memory cache of a trades table's per-strategy aggregates.
+
+    The table is loaded once and only reloaded when the database has really changed. Changes are
+    detected with `PRAGMA data_version` on a long-lived connection (which changes whenever another
+    connection commits) together with the inode of the database file (which changes if the file is replaced).
+    Trades inserted through the store are written on that same connection and applied to the
+    aggregates as deltas, so they never trigger a reload. The database is switched to WAL mode when
+    the connection opens, so inserts never block readers in other connections.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        table (str): Name of the trades table.
+
+    Methods:
+        refresh(): Reloads the table if the database changed since the last load.
+        get_aggregates(): Returns the up-to-date aggregates of the table.
+        pnl(strategy_id): Returns the up-to-date PnL of a strategy.
+        insert_trades(trades): Bulk-inserts trades and updates the aggregates incrementally.
+    """
+    def __init__(self, db_path: str = DATABASE_PATH, table: str = TRADES_TABLE):
+        self.db_path = db_path
+        self.table = table
+        self.aggregates = None
+        self.rows_loaded = 0
+        self._conn = None
+        self._version = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One long-lived connection per process, shared by all worker threads under the lock.
+        # Commits made on it do not change its own data_version, so the store's writes never force a reload.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            # Persistent in the file, so this is a no-op once the database is in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass  # A read-only database is still served, in its current journal mode
+        return conn
+
+    def _database_version(self) -> tuple:
+        # A missing file would otherwise be silently created as an empty database on connect
+        try:
+            inode = os.stat(self.db_path).st_ino
+        except FileNotFoundError:
+            raise sqlite3.OperationalError(f"unable to open database file: {self.db_path}")
+
+        # Reconnect if the database file was replaced, since the old connection still sees the old file
+        if self._conn is None or self._version is None or self._version[0] != inode:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = self._connect()
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return (inode, data_version)
+
+    def refresh(self, timer: PhaseTimer = None) -> bool:
+        """
+        Reloads the trades table and its aggregates if the database changed since the last load.
+
+        Args:
+            timer (PhaseTimer): If given, records the 'connect', 'read_sql_query' and 'compute_pnl' phases.
+
+        Returns:
+            bool: True if the table was reloaded, False if the cached data was still current.
+        """
+        timer = timer or PhaseTimer()
+        with self._lock:
+            with timer.phase('connect'):
+                version = self._database_version()
+            if version == self._version:
+                return False
+
+            # Load the table once and precompute the per-strategy aggregates
+            with timer.phase('read_sql_query'):
+                trades_df = pd.read_sql_query(f"SELECT * FROM {self.table}", self._conn)
+            with timer.phase('compute_pnl'):
+                self.aggregates = Trade_Aggregates.from_frame(trades_df)
+            self.rows_loaded = len(trades_df)
+            self._version = version
+            return True
+
+    def get_aggregates(self) -> Trade_Aggregates:
+        """
+        Returns the aggregates of the trades table, reloading it first if the database changed.
+
+        Returns:
+            Trade_Aggregates: The up-to-date aggregates.
+        """
+        with self._lock:
+            self.refresh()
+            return self.aggregates
+
+    def pnl(self, strategy_id: str) -> float:
+        """
+        Returns the PnL of a strategy, reloading the table first if the database changed.
+
+        Args:
+            strategy_id (str): The ID of the strategy.
+
+        Returns:
+            float: The PnL of the strategy, 0 if it has no trades.
+        """
+        return self.get_aggregates().pnl(strategy_id)
+
+    def insert_trades(self, trades: list, batch_size: int = 1000) -> int:
+        """
+        Bulk-inserts trades into the table and applies them to the cached aggregates as deltas.
+
+        Trades are inserted with `executemany`, one transaction per batch, with the database in WAL mode
+        (set when the store connects) so that readers in other connections are never blocked. After each committed batch the aggregates
+        are replaced by an updated copy, so concurrent readers always see a consistent snapshot.
+
+        Args:
+            trades (list): Trades as dicts with 'id', 'quantity', 'price', 'side' and 'strategy' keys.
+            batch_size (int): Number of trades per transaction.
+
+        Returns:
+            int: The number of trades inserted.
+
+        Raises:
+            ValueError: If a trade is malformed (nothing is inserted).
+            sqlite3.IntegrityError: If a trade ID already exists or a row breaks another constraint of the
+                table (the batches before it stay inserted).
+        """
+        rows = [_trade_row(trade) for trade in trades]
+
+        with self._lock:
+            # Bring the aggregates up to date first, so the deltas are applied to the current state
+            self.refresh()
+
+            inserted = 0
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                try:
+                    with self._conn:  # Commits the batch, or rolls it back on error
+                        self._conn.executemany(
+                            f"INSERT INTO {self.table} (id, quantity, price, side, strategy) VALUES (?, ?, ?, ?, ?)", batch)
+                except sqlite3.IntegrityError as e:
+                    raise sqlite3.IntegrityError(f"{e} (after inserting {inserted} trades)") from e
+
+                # Apply the batch to a copy of the aggregates and swap it in
+                batch_df = pd.DataFrame(batch, columns=['id', 'quantity', 'price', 'side', 'strategy'])
+                self.aggregates = Trade_Aggregates().merge(self.aggregates).merge(Trade_Aggregates.from_frame(batch_df))
+                inserted += len(batch)
+
+            return inserted
+
+def _trade_row(trade: dict) -> tuple:
+    # Validate one incoming trade and convert it to an (id, quantity, price, side, strategy) row
+    try:
+        trade_id, quantity, price, side, strategy = (trade[key] for key in ('id', 'quantity', 'price', 'side', 'strategy'))
+    except (KeyError, TypeError):
+        raise ValueError(f"Trade {trade!r} must have 'id', 'quantity', 'price', 'side' and 'strategy' fields")
+    if side not in ('buy', 'sell'):
+        raise ValueError(f"Trade {trade_id!r} has side {side!r}, expected 'buy' or 'sell'")
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        raise ValueError(f"Trade {trade_id!r} has a non-integer quantity {quantity!r}")
+    if not isinstance(price, (int, float)) or isinstance(price, bool):
+        raise ValueError(f"Trade {trade_id!r} has a non-numeric price {price!r}")
+    if not math.isfinite(price):
+        raise ValueError(f"Trade {trade_id!r} has a non-finite price {price!r}")
+    return (str(trade_id), quantity, float(price), side, str(strategy))
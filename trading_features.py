@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ## Feature frame of the Task 2.7 trading strategy
+
+# Columns of the analysis data used by the strategy, and their names in the feature frame
+FEATURE_SOURCE_COLUMNS = {
+    'time': 'Day T',
+    'Intraday Price Hourly  [in EUR/MWh]': 'Intra Price (EUR/MWh)',
+    'Day Ahead Price hourly [in EUR/MWh]': 'DA Price (EUR/MWh)',
+    'Wind Day Ahead Forecast [in MW]': 'Wind DA Forecast (MW)',
+    'PV Day Ahead Forecast [in MW]': 'PV DA Forecast (MW)',
+}
+
+# Model inputs, the predicted next-day intraday price, and the prices the strategy trades at
+FEATURE_COLUMNS = ['Intra Price (EUR/MWh)', 'DA Price (EUR/MWh)', 'Wind DA Forecast (MW)', 'PV DA Forecast (MW)']
+TARGET_COLUMN = 'Intra T+1 Price (EUR/MWh)'
+DA_PRICE_COLUMN = 'DA Price (EUR/MWh)'
+
+# Slots per day of the wall-clock grid (quarter-hours)
+PERIODS_PER_DAY = 96
+
+class WallClockGrid:
+    """
+    Aligns quarter-hourly rows on a complete grid of calendar days x wall-clock quarter-hours.
+
+    Every row is placed by its local date and wall-clock time, not by its position, so leads and lags
+    stay aligned across DST days: the 92 quarter-hours of the spring-forward day leave 4 empty slots,
+    and the repeated hour of the 100-quarter-hour fall-back day maps onto the same slots as its first
+    occurrence (the grid holds the first occurrence's value). On the grid, a lag of k quarter-hours
+    is a constant offset, so lag matrices are strided views of one array.
+
+    Args:
+        times (pd.Series): Local wall-clock times of the rows (tz-aware times are converted to their
+            local wall clock).
+        periods_per_day (int): Number of grid slots per day.
+
+    Methods:
+        to_grid(values): Returns the values on the grid.
+        shift(values, periods): Returns every row's value the given number of quarter-hours later.
+        lag_matrix(values, lags): Returns a strided view of several lags of the values on the grid.
+    """
+    def __init__(self, times: pd.Series, periods_per_day: int = PERIODS_PER_DAY):
+        times = pd.Series(times)
+        if times.dt.tz is not None:
+            times = times.dt.tz_localize(None)
+        self.periods_per_day = periods_per_day
+
+        days = times.dt.normalize()
+        self.first_day = days.min()
+        day_number = ((days - self.first_day) // pd.Timedelta(days=1)).to_numpy()
+        slot = ((times - days) // (pd.Timedelta(days=1) / periods_per_day)).to_numpy()
+        self.num_days = int(day_number.max()) + 1 if len(times) else 0
+
+        # Grid position of every row, and whether the row is the first one at its position
+        self.positions = day_number * periods_per_day + slot
+        self.first_occurrence = ~pd.Series(self.positions).duplicated().to_numpy()
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """
+        The wall-clock time of every grid slot.
+        """
+        return pd.date_range(self.first_day, periods=self.num_days * self.periods_per_day,
+                             freq=pd.Timedelta(days=1) / self.periods_per_day)
+
+    def to_grid(self, values) -> np.ndarray:
+        """
+        Returns the values on the grid (NaN for slots without a row).
+        """
+        grid = np.full(self.num_days * self.periods_per_day, np.nan)
+        grid[self.positions[self.first_occurrence]] = np.asarray(values, dtype=float)[self.first_occurrence]
+        return grid
+
+    def shift(self, values, periods: int) -> np.ndarray:
+        """
+        Returns, for every row, the value at the same wall-clock time shifted by periods quarter-hours.
+
+        Args:
+            values (array-like): One value per row.
+            periods (int): Number of quarter-hours to look ahead (negative to look back), e.g. 96 for
+                the same quarter-hour on the next day.
+
+        Returns:
+            np.ndarray: One value per row (NaN where the shifted slot has no row).
+        """
+        grid = self.to_grid(values)
+        target = self.positions + periods
+        valid = (target >= 0) & (target < len(grid))
+        return np.where(valid, grid[np.clip(target, 0, len(grid) - 1)], np.nan)
+
+    def lag_matrix(self, values, lags) -> np.ndarray:
+        """
+        Returns several lags of the values as a strided view on the grid.
+
+        Args:
+            values (array-like): One value per row.
+            lags (range or list of int): Non-negative lags in quarter-hours. Evenly spaced lags (e.g.
+                range(0, 7 * 96, 96) for the same quarter-hour on each of the last 7 days) give a view
+                that shares the memory of one padded copy of the values; other lags are copied.
+
+        Returns:
+            np.ndarray: Shape (grid slots, lags); column j holds the value lags[j] quarter-hours
+            before each slot (NaN before the first row). Use self.positions to select the rows.
+        """
+        lags = list(lags)
+        if min(lags) < 0:
+            raise ValueError("Lags must be non-negative, use shift() for leads")
+        max_lag = max(lags)
+
+        # One padded copy of the series; every window is a view into it, newest value first
+        padded = np.concatenate([np.full(max_lag, np.nan), self.to_grid(values)])
+        windows = sliding_window_view(padded, max_lag + 1)[:, ::-1]
+
+        steps = np.diff(lags)
+        if len(lags) == 1 or (steps[0] != 0 and (steps == steps[0]).all()):
+            step = int(steps[0]) if len(lags) > 1 else 1
+            stop = lags[-1] + (1 if step > 0 else -1)
+            return windows[:, lags[0]:stop if stop >= 0 else None:step]
+        return windows[:, lags]
+
+def lag_columns(lag_days: int) -> list:
+    """
+    Returns the names of the lagged intraday price columns added by feature_frame(df, lag_days=...).
+    """
+    return [f"Intra T-{k} Price (EUR/MWh)" for k in range(1, lag_days + 1)]
+
+def feature_frame(df: pd.DataFrame, by_timestamp: bool = True, lag_days: int = 0) -> pd.DataFrame:
+    """
+    Builds the feature frame of Task 2.7.1 ('d1') from the analysis data.
+
+    Args:
+        df (pd.DataFrame): The quarter-hourly analysis data.
+        by_timestamp (bool): Whether to take the next-day values at the same wall-clock quarter-hour
+            (correct across DST days), or 96 rows later as in Task 2.7.1.
+        lag_days (int): Number of daily lags of the intraday price to add (the same wall-clock
+            quarter-hour 1 to lag_days days earlier, see lag_columns); needs by_timestamp.
+
+    Returns:
+        pd.DataFrame: 'Day T+1', 'Intra T+1 Price (EUR/MWh)', 'Day T', the feature columns and the lag
+        columns; rows without a next-day value (the last day, and the quarter-hours skipped by DST)
+        have NaN, and so do lags before the first day or on the quarter-hours skipped by DST.
+
+    Raises:
+        ValueError: If lag_days is given without by_timestamp.
+    """
+    time, intra_price = df['time'], df['Intraday Price Hourly  [in EUR/MWh]']
+    if by_timestamp:
+        grid = WallClockGrid(time)
+        target = pd.Series(grid.shift(intra_price, PERIODS_PER_DAY), index=df.index)
+        next_day = (time + pd.Timedelta(days=1)).where(target.notna())
+    elif lag_days:
+        raise ValueError("Lag features are aligned by timestamp, pass by_timestamp=True")
+    else:
+        target = intra_price.shift(-PERIODS_PER_DAY)
+        next_day = time.shift(-PERIODS_PER_DAY)
+
+    # Built in one pass, in its final column order, instead of selecting, renaming and reordering copies
+    columns = {'Day T+1': next_day, TARGET_COLUMN: target}
+    columns.update({name: df[source] for source, name in FEATURE_SOURCE_COLUMNS.items()})
+    if lag_days:
+        # All lags come from one strided view of the grid; only the rows' values are copied, once
+        lags = grid.lag_matrix(intra_price, range(PERIODS_PER_DAY, (lag_days + 1) * PERIODS_PER_DAY, PERIODS_PER_DAY))
+        lag_values = lags[grid.positions]
+        columns.update({name: lag_values[:, k] for k, name in enumerate(lag_columns(lag_days))})
+    return pd.DataFrame(columns, index=df.index)
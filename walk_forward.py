@@ -0,0 +1,79 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from signal_evaluation import strategy_pnl
+from trading_features import FEATURE_COLUMNS, TARGET_COLUMN, DA_PRICE_COLUMN
+
+# ## Walk-forward backtest of the Task 2.7 OLS strategy
+
+def walk_forward_ols(d1: pd.DataFrame, window_days: int = None, min_train_days: int = 7,
+                     features: list = FEATURE_COLUMNS, target: str = TARGET_COLUMN) -> pd.DataFrame:
+    """
+    Backtests the OLS strategy out of sample, refitting the regression before every day.
+
+    Each day is predicted with coefficients fitted only on the rows whose target (the next-day
+    intraday price) was already realised before that day started. The normal equations X'X and X'y
+    are updated incrementally: every new row adds its rank-one outer product (O(k^2) per row, summed
+    per day as X_d'X_d), and in a rolling window the terms of the day leaving the window are
+    subtracted again, so refitting every day costs a k x k solve instead of a full regression.
+
+    Args:
+        d1 (pd.DataFrame): The feature frame of Task 2.7.1 (see trading_features.feature_frame), in time order.
+        window_days (int): Number of most recent days to fit on, None for an expanding window.
+        min_train_days (int): Number of days of training data needed before the first prediction.
+        features (list): The feature columns (an intercept is added).
+        target (str): The target column.
+
+    Returns:
+        pd.DataFrame: For every row with a target and every feature (index of d1): 'Day T', 'prediction' (NaN before
+        min_train_days), 'buy', 'sell' and 'P/L' of the Task 2.7.3 rule.
+    """
+    data = d1.dropna(subset=[target] + list(features))
+    X = np.column_stack([np.ones(len(data)), data[features].to_numpy(dtype=float)])
+    y = data[target].to_numpy(dtype=float)
+    day = data['Day T'].dt.normalize().to_numpy()
+    target_time = data['Day T+1'].to_numpy()
+    num_features = X.shape[1]
+
+    # Normal equations of the training rows, and the contribution of each training day (to subtract it later)
+    xtx = np.zeros((num_features, num_features))
+    xty = np.zeros(num_features)
+    daily_terms = deque()  # (day, X'X of the day, X'y of the day)
+
+    predictions = np.full(len(data), np.nan)
+    day_starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    day_ends = np.r_[day_starts[1:], len(data)]
+    next_row = 0  # First row not yet in the training set
+
+    for start, end in zip(day_starts, day_ends):
+        # Add every row whose target was realised before this day starts (rows are in time order)
+        available = next_row + np.searchsorted(target_time[next_row:], day[start], side='left')
+        while next_row < available:
+            # The new rows of one day: the sum of their rank-one outer products is X_d'X_d
+            segment_end = min(day_ends[np.searchsorted(day_starts, next_row, side='right') - 1], available)
+            X_d, y_d = X[next_row:segment_end], y[next_row:segment_end]
+            day_xtx, day_xty = X_d.T @ X_d, X_d.T @ y_d
+            if daily_terms and daily_terms[-1][0] == day[next_row]:
+                daily_terms[-1][1][:] += day_xtx
+                daily_terms[-1][2][:] += day_xty
+            else:
+                daily_terms.append((day[next_row], day_xtx, day_xty))
+            xtx += day_xtx
+            xty += day_xty
+            next_row = segment_end
+
+        # In a rolling window, drop the days that left it
+        while window_days is not None and len(daily_terms) > window_days:
+            _, day_xtx, day_xty = daily_terms.popleft()
+            xtx -= day_xtx
+            xty -= day_xty
+
+        if len(daily_terms) >= min_train_days:
+            coefficients = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+            predictions[start:end] = X[start:end] @ coefficients
+
+    result = strategy_pnl(predictions, data[DA_PRICE_COLUMN], y)
+    result.insert(0, 'prediction', predictions)
+    result.insert(0, 'Day T', data['Day T'].to_numpy())
+    result.index = data.index
+    return result